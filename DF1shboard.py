@@ -5,39 +5,22 @@ import streamlit as st
 from sklearn import svm
 import toml
 
-from utils import data, func, style
+from utils import cache, data, func, graph, standings, store, style
 
 # Load settings from the settings.toml file
 settings = func.read_settings()
 DATA_FOLDER = settings["dashboard"].get("data_folder", f"./data/")
+# race type radio -> Sprint of the standings pairs to count, None for both
+SESSIONS = {"Race": False, "Sprint": True, "Both": None}
 
 def short_legend(name):
     return name[:15] + "..." if len(name) > 15 else name
 
 
-# @st.cache_data()
-def get_points_over_time(results_df, entity="DriverName"):
-    if entity == "DriverName":
-        summed_df = results_df.groupby(
-            ["Country", "EndDate", "TeamName", entity]
-        ).sum()["Points"]
-    if entity == "TeamName":
-        summed_df = results_df.groupby(["Country", "EndDate", entity]).sum()["Points"]
-    summed_df = summed_df.reset_index().sort_values(
-        by=["EndDate", "TeamName", entity], ascending=[True, True, True]
-    )
-
-    piv_table = summed_df.pivot_table(["Points"], ["Country"], [entity], sort=False)
-    piv_table = piv_table.astype(float).fillna(0).cumsum(axis=0)
-    piv_table = piv_table.stack(future_stack=True).reset_index()
-    return piv_table
-
-
 @st.cache_data()
-def plot_points_over_time(results_df, entity="DriverName", **kwargs):
-    piv_table = get_points_over_time(results_df, entity=entity)
+def plot_points_over_time(points_over_time, entity="DriverName", **kwargs):
     fig = px.line(
-        piv_table,
+        points_over_time,
         x="Country",
         y="Points",
         line_group=entity,
@@ -58,55 +41,98 @@ def plot_points_over_time(results_df, entity="DriverName", **kwargs):
     return fig
 
 
-@st.cache_data()
+# DERIVED TABLES ######################################################
+# nodes of the graph of a rerun (see graph.Graph), the sections ask it for
+# the tables they need and share them
+
+
+def season_points(season_standings, entity):
+    """points per entity over the whole season, most first"""
+    return season_standings.season_points(entity).sort_values(ascending=False)
+
+
+def entity_names(season_standings, entity, start, end, teams, start_rows):
+    return season_standings.names(
+        entity, start, end, teams=teams, start_rows=start_rows
+    )
+
+
+def cumulative_points(
+    season_standings, entity, start, end, teams, start_rows, start_date
+):
+    return season_standings.points_over_time(
+        entity, start, end, teams=teams, start_rows=start_rows, start_date=start_date
+    )
+
+
+def totals(season_standings, entity, how, start, end, teams, start_rows):
+    """points per entity, "mean" or "sum", ties stay in name order"""
+    points = season_standings.points(
+        entity, start, end, how=how, teams=teams, start_rows=start_rows
+    )
+    return points.sort_values(by="Points", ascending=False, kind="stable")
+
+
+def position_counts(season_standings, entity_names, entity, sprint, start, end, teams):
+    counts = season_standings.position_counts(
+        entity, start, end, teams=teams, sprint=SESSIONS[sprint]
+    )
+    return counts.reindex(entity_names).fillna(0)
+
+
+def points_matrix(
+    season_standings, entity_names, races_df, entity, sprint, start, end, teams
+):
+    """points of every entity in every race, entity x Country"""
+    piv_table = season_standings.points_by_race(
+        entity, start, end, teams=teams, sprint=SESSIONS[sprint]
+    )
+    piv_table = piv_table.reindex(entity_names, axis=0)
+    piv_table = piv_table.reindex(races_df["Country"].tolist(), axis=1)
+    return piv_table.astype(float).fillna(0)
+
+
+def points_left(races_df, entity):
+    """points still to win before each race and after the last one"""
+    max_pts_nosprint = 44 if entity == "TeamName" else 26
+    max_pts_sprint = 59 if entity == "TeamName" else 34
+    per_race = races_df["HasSprint"].apply(
+        lambda x: max_pts_sprint if x else max_pts_nosprint
+    )
+    return per_race[::-1].cumsum()[::-1].tolist() + [0]
+
+
+NODES = [
+    season_points,
+    entity_names,
+    cumulative_points,
+    totals,
+    position_counts,
+    points_matrix,
+    points_left,
+]
+
+
+# held once for all sessions (see cache.SeasonCache), the season fingerprint
+# is the version, a save reloads just that season
 def load_data(selected_season):
     DATA_FOLDER = f"./data/{selected_season}"
 
-    # Load the races from the CSV file
+    # the tables of the season and the running totals of its results, the
+    # result rows themselves are only read when the totals are out of date
+    def load():
+        races_df, teams_df, drivers_df, _ = data.load_season(
+            DATA_FOLDER, results=False
+        )
+        return races_df, teams_df, drivers_df, standings.load(DATA_FOLDER)
+
     try:
-        races_df = pd.read_csv(
-            DATA_FOLDER + "/races.csv",
-            parse_dates=["StartDate", "EndDate"],
+        return cache.get_season_cache().get(
+            (DATA_FOLDER, "dashboard"), store.fingerprint(DATA_FOLDER), load
         )
-        drivers_df = pd.read_csv(DATA_FOLDER + "/drivers.csv")
-        teams_df = pd.read_csv(DATA_FOLDER + "/teams.csv")
     except FileNotFoundError:
         st.warning("Data not found. Please configure the data in apropiate tabs.")
         st.stop()
-    races_df["StartDate"] = pd.to_datetime(races_df["StartDate"]).dt.date
-    races_df["EndDate"] = pd.to_datetime(races_df["EndDate"]).dt.date
-
-    # Load the results from the CSV file
-    results_df = pd.DataFrame()
-    for country, has_sprint, end_date in races_df[
-        ["Country", "HasSprint", "EndDate"]
-    ].values:
-        race_file = f"{DATA_FOLDER}/races/race_{country}.csv"
-        sprint_file = f"{DATA_FOLDER}/races/sprint_{country}.csv"
-        try:
-            race_df = pd.read_csv(race_file)
-            race_df["Sprint"] = False
-            if has_sprint:
-                sprint_df = pd.read_csv(sprint_file)
-                sprint_df["FastestLap"] = 0
-                sprint_df["Sprint"] = True
-            else:
-                sprint_df = None
-        except FileNotFoundError:
-            race_df = data.RACE_DEFAULT
-            sprint_df = data.SPRINT_DEFAULT
-
-        df = pd.concat([race_df, sprint_df], axis=0)
-        df["Country"] = country
-        df["EndDate"] = end_date
-        results_df = pd.concat([results_df, df], axis=0) if not results_df.empty else df
-
-    # FIXME type conversion stuff
-    results_df["Points"] = results_df["Points"].astype(float)
-    results_df["Points"] = results_df["Points"] + results_df["FastestLap"]
-    results_df["EndDate"] = pd.to_datetime(results_df["EndDate"]).dt.date
-
-    return races_df, teams_df, drivers_df, results_df
 
 
 def main():
@@ -127,7 +153,15 @@ def main():
             disabled=not saved_seasons,
         )
 
-    races_df, teams_df, drivers_df, results_df = load_data(selected_season)
+    races_df, teams_df, drivers_df, season_standings = load_data(selected_season)
+    # only set when the season was (re)loaded by this server process
+    load_time = data.LOAD_TIMES.get(f"./data/{selected_season}")
+    standings_time = standings.LOAD_TIMES.get(f"./data/{selected_season}")
+    if load_time is not None and standings_time is not None:
+        st.sidebar.caption(
+            f"{selected_season} loaded in {load_time * 1000:.0f} ms, "
+            f"standings in {standings_time * 1000:.0f} ms"
+        )
 
     team_to_color = teams_df.set_index("TeamName")["Color"].to_dict()
     drivers_df["Color"] = drivers_df["TeamName"].map(team_to_color)
@@ -138,10 +172,8 @@ def main():
         .apply(lambda nr: line_styles[nr % len(line_styles)])
     )
     race_names = races_df["Country"].tolist()
-    driver_points_sum = results_df.groupby("DriverName")["Points"].sum()
-    driver_names = driver_points_sum.sort_values(ascending=False).index
-    team_points_sum = results_df.groupby("TeamName")["Points"].sum()
-    team_names = team_points_sum.sort_values(ascending=False).index
+    tables = graph.Graph(NODES, season_standings=season_standings, races_df=races_df)
+    team_names = tables("season_points", entity="TeamName").index
 
     # START ############################################################
     today = pd.to_datetime("today").date()
@@ -158,18 +190,9 @@ def main():
         )
 
 
-    start_points = pd.DataFrame(
-        {
-            "Country": "",
-            "EndDate": pd.to_datetime(
-                f"{races_df["StartDate"].min().year}-01-01"
-            ).date(),
-            "DriverName": drivers_df["DriverName"],
-            "TeamName": drivers_df["TeamName"],
-            "Points": 0,
-        }
-    )
-    results_df = pd.concat([start_points, results_df], axis=0)
+    # every driver starts the season with 0 points, a row without a race
+    start_rows = drivers_df[["DriverName", "TeamName"]]
+    start_date = pd.to_datetime(f"{races_df["StartDate"].min().year}-01-01").date()
 
     # FILTER ############################################################
     # two slide slider for the range
@@ -183,9 +206,8 @@ def main():
         race_names.index(season_start),
         race_names.index(season_end),
     )
-    filtered_countries = race_names[season_start_idx : season_end_idx + 1] + [""]
-
-    results_df = results_df[results_df["Country"].isin(filtered_countries)]
+    # the range of races the tables are computed for
+    selected = dict(start=season_start_idx, end=season_end_idx)
 
     # team name filter, multi select
     with st.sidebar:#.expander("Filter", expanded=True):
@@ -202,20 +224,25 @@ def main():
             label_visibility="collapsed",
             disabled=not filter_by_team,
         )
+        teams = None
         if filter_by_team and selected_teams:
-            results_df = results_df[results_df["TeamName"].isin(selected_teams)]
+            teams = selected_teams
+            start_rows = start_rows[start_rows["TeamName"].isin(teams)]
             
             
     # reassign team names to the filtered teams
-    team_names = results_df["TeamName"].unique()
-    driver_names = results_df["DriverName"].unique()
+    tables.provide(
+        **selected, teams=teams, start_rows=start_rows, start_date=start_date
+    )
+    team_names = tables("entity_names", entity="TeamName")
+    driver_names = tables("entity_names", entity="DriverName")
 
     # PLOT ############################################################
 
     cols = st.columns(2)
 
     driver_point_over_time_graph = plot_points_over_time(
-        results_df,
+        tables("cumulative_points", entity="DriverName"),
         entity="DriverName",
         color_discrete_map=drivers_df.set_index("DriverName")["Color"].to_dict(),
         line_dash_map=drivers_df.set_index("DriverName")["LineStyle"].to_dict(),
@@ -224,7 +251,7 @@ def main():
     )
 
     team_points_over_time_grpah = plot_points_over_time(
-        results_df,
+        tables("cumulative_points", entity="TeamName"),
         entity="TeamName",
         color_discrete_map=team_to_color,
         line_dash_sequence=["solid"],
@@ -245,33 +272,25 @@ def main():
             "Entity", ["DriverName", "TeamName"], label_visibility="collapsed"
         )
 
-        # calculate points left for each race
-        max_pts_nosprint = 44 if entity == "TeamName" else 26
-        max_pts_sprint = 59 if entity == "TeamName" else 34
-        races_df["PointsLeft"] = races_df["HasSprint"].apply(
-            lambda x: max_pts_sprint if x else max_pts_nosprint
-        )
-        races_df["PointsLeft"] = races_df["PointsLeft"][::-1].cumsum()[::-1]
-
-        points_over_time = get_points_over_time(results_df, entity=entity)
+        entity_over_time = tables("cumulative_points", entity=entity)
         options = driver_names if entity == "DriverName" else team_names
-        max_idx = points_over_time["Points"].idxmax()
-        max_entity = points_over_time.loc[max_idx][entity]
+        max_idx = entity_over_time["Points"].idxmax()
+        max_entity = entity_over_time.loc[max_idx][entity]
         driver1 = st.selectbox(
             "Select 1",
             options,
-            index=options.tolist().index(max_entity),
+            index=options.index(max_entity),
             label_visibility="collapsed",
         )
         driver2 = st.selectbox(
             "Select 2", options, label_visibility="collapsed", index=1
         )
 
-        points_over_time = points_over_time[
-            points_over_time[entity].isin([driver1, driver2])
+        entity_over_time = entity_over_time[
+            entity_over_time[entity].isin([driver1, driver2])
         ]
-        piv = points_over_time.pivot_table(
-            "Country", "Country", entity, fill_value=0, sort=False
+        piv = entity_over_time.pivot_table(
+            "Points", "Country", entity, fill_value=0, sort=False, observed=True
         )
         piv["Diff"] = piv[driver1] - piv[driver2]
         piv.reset_index(inplace=True)
@@ -301,7 +320,7 @@ def main():
         X_train = X_total[-last_n:]
         y_total = piv["Diff"].values
         y_train = y_total[-last_n:]
-        points_left = races_df["PointsLeft"].values.tolist() + [0]
+        points_left = tables("points_left", entity=entity)
 
         model = svm.SVR(kernel="linear")
         model.fit(X_train, y_train)
@@ -373,14 +392,10 @@ def main():
             horizontal=True,
             label_visibility="collapsed",
         )
-        avg_points = (
-            results_df.groupby("DriverName")["Points"]
-            .agg(agg_method)
-            .round(2)
-            .reset_index()
+        avg_points = tables("totals", entity="DriverName", how=agg_method)
+        avg_points = avg_points.assign(
+            DriverName=avg_points["DriverName"].apply(short_legend)
         )
-        avg_points = avg_points.sort_values(by="Points", ascending=False)
-        avg_points["DriverName"] = avg_points["DriverName"].apply(short_legend)
         fig = px.bar(
             avg_points,
             x="DriverName",
@@ -399,14 +414,10 @@ def main():
             horizontal=True,
             label_visibility="collapsed",
         )
-        avg_points = (
-            results_df.groupby("TeamName")["Points"]
-            .agg(agg_method)
-            .round(2)
-            .reset_index()
+        avg_points = tables("totals", entity="TeamName", how=agg_method)
+        avg_points = avg_points.assign(
+            TeamName=avg_points["TeamName"].apply(short_legend)
         )
-        avg_points = avg_points.sort_values(by="Points", ascending=False)
-        avg_points["TeamName"] = avg_points["TeamName"].apply(short_legend)
         fig = px.bar(
             avg_points,
             x="TeamName",
@@ -432,17 +443,7 @@ def main():
         )
         show_values = st.toggle("Show Values 1", value=False)
     with cols[1]:
-        if sprint == "Race":
-            positions_df = results_df[results_df["Sprint"] == False]
-        elif sprint == "Sprint":
-            positions_df = results_df[results_df["Sprint"] == True]
-        else:
-            positions_df = results_df
-        positions_df = positions_df[[entity, "Position"]]
-        positions_df = positions_df.groupby(entity)["Position"].value_counts()
-        positions_df = positions_df.unstack().fillna(0)
-        order = driver_names if entity == "DriverName" else team_names
-        positions_df = positions_df.reindex(order).fillna(0)
+        positions_df = tables("position_counts", entity=entity, sprint=sprint)
         # FIXME: layout is completely off when driver-team pair is missing in data
         fig = px.imshow(
             positions_df,
@@ -473,22 +474,7 @@ def main():
         )
         show_values = st.toggle("Show Values 2", value=False)
     with cols[1]:
-        if sprint == "Race":
-            piv_table = results_df[results_df["Sprint"] == False]
-        elif sprint == "Sprint":
-            piv_table = results_df[results_df["Sprint"] == True]
-        else:
-            piv_table = results_df
-        piv_table = piv_table.pivot_table(
-            values="Points",
-            index=entity,
-            columns="Country",
-            aggfunc="sum",
-        )
-        order = driver_names if entity == "DriverName" else team_names
-        piv_table = piv_table.reindex(order, axis=0)
-        piv_table = piv_table.reindex(race_names, axis=1)
-        piv_table = piv_table.astype(float).fillna(0)
+        piv_table = tables("points_matrix", entity=entity, sprint=sprint)
         # make heatmap with points displayed
         fig = px.imshow(
             piv_table,
@@ -503,6 +489,10 @@ def main():
         )
         st.plotly_chart(fig, use_container_width=True)
 
+    # how often the tables of this rerun were computed and reused
+    with st.sidebar.expander("Computed Tables"):
+        st.dataframe(tables.stats(), hide_index=True, use_container_width=True)
+
 
 if __name__ == "__main__":
     style.set_page_config()
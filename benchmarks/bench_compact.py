@@ -0,0 +1,88 @@
+"""memory and groupby time of the results table, compact types vs plain
+
+python -m benchmarks.bench_compact [--seasons 20] [--races 24] [-n 5]
+
+loads synthetic seasons (see bench_load) with data.load_season and puts
+their results together, as a process serving many seasons would hold them.
+the plain copy has the types results had before data.compact_results:
+strings, float64 points and object flags. both run the groupby and pivot
+steps of the dashboard.
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_load import write_season
+from utils import data, store
+
+
+def plain(results_df):
+    return results_df.astype(
+        {
+            "Position": "float64",
+            "DriverName": "str",
+            "TeamName": "str",
+            "Points": "float64",
+            "FastestLap": "object",
+            "Sprint": "object",
+            "Country": "str",
+        }
+    )
+
+
+def dashboard_steps(results_df):
+    results_df.groupby("DriverName", observed=True)["Points"].sum()
+    results_df.groupby(["Country", "EndDate", "TeamName", "DriverName"], observed=True)[
+        "Points"
+    ].sum()
+    results_df.groupby("DriverName", observed=True)["Position"].value_counts()
+    results_df.pivot_table(
+        values="Points",
+        index="DriverName",
+        columns="Country",
+        aggfunc="sum",
+        observed=True,
+    )
+
+
+def bench(func, df, n):
+    best = math.inf
+    for _ in range(n):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--races", type=int, default=24, help="races per season")
+    parser.add_argument("-n", type=int, default=5, help="repetitions, best counts")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        frames = []
+        for i in range(args.seasons):
+            folder = os.path.join(root, str(2000 + i))
+            write_season(store.CsvStore(folder), str(2000 + i), args.races, seed=i)
+            frames.append(data.load_season(folder)[3])
+    # the seasons share drivers, teams and countries, so the categories too
+    compact = pd.concat(frames, ignore_index=True)
+    tables = {"plain": plain(compact), "compact": compact}
+
+    print(f"{len(compact)} result rows from {args.seasons} seasons")
+    print(f"{'types':<8} {'memory kB':>10} {'groupby ms':>11}")
+    for name, df in tables.items():
+        memory = df.memory_usage(deep=True).sum() / 1000
+        groupby_time = bench(dashboard_steps, df, args.n)
+        print(f"{name:<8} {memory:>10.0f} {groupby_time * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
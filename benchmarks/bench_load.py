@@ -0,0 +1,145 @@
+"""dashboard load time per season and storage layout
+
+python -m benchmarks.bench_load [--seasons 3] [--races 24] [-n 5]
+
+writes synthetic seasons in every layout of utils/store.py to a temporary
+data folder and times data.load_season on each of them. the old loader
+(serial reads with inferred types and a concat per race, kept below as
+reference) runs on the csv layout for comparison, both must give the same
+results table.
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import data, store
+
+
+def load_rows(folder):
+    """load_data before it was batched, csv layout only"""
+    races_df = pd.read_csv(folder + "/races.csv", parse_dates=["StartDate", "EndDate"])
+    races_df["EndDate"] = pd.to_datetime(races_df["EndDate"]).dt.date
+    results_df = pd.DataFrame()
+    for country, has_sprint, end_date in races_df[
+        ["Country", "HasSprint", "EndDate"]
+    ].values:
+        try:
+            race_df = pd.read_csv(f"{folder}/races/race_{country}.csv")
+            race_df["Sprint"] = False
+            if has_sprint:
+                sprint_df = pd.read_csv(f"{folder}/races/sprint_{country}.csv")
+                sprint_df["FastestLap"] = 0
+                sprint_df["Sprint"] = True
+            else:
+                sprint_df = None
+        except FileNotFoundError:
+            race_df = data.RACE_DEFAULT
+            sprint_df = data.SPRINT_DEFAULT
+        df = pd.concat([race_df, sprint_df], axis=0)
+        df["Country"] = country
+        df["EndDate"] = end_date
+        results_df = pd.concat([results_df, df], axis=0) if not results_df.empty else df
+    results_df["Points"] = results_df["Points"].astype(float)
+    results_df["Points"] = results_df["Points"] + results_df["FastestLap"]
+    return results_df
+
+
+def write_season(season_store, year, races, seed):
+    rng = np.random.default_rng(seed)
+    drivers = pd.DataFrame(
+        {
+            "DriverName": [f"Driver {i}" for i in range(20)],
+            "TeamName": [f"Team {i // 2}" for i in range(20)],
+        }
+    )
+    season_store.write_table("drivers", drivers)
+    season_store.write_table(
+        "teams",
+        pd.DataFrame(
+            {"TeamName": [f"Team {i}" for i in range(10)], "Color": "#FF0000"}
+        ),
+    )
+    start = pd.Timestamp(f"{year}-03-01")
+    season_store.write_table(
+        "races",
+        pd.DataFrame(
+            {
+                "StartDate": [start + pd.Timedelta(weeks=i) for i in range(races)],
+                "EndDate": [
+                    start + pd.Timedelta(weeks=i, days=2) for i in range(races)
+                ],
+                "Country": [f"Country {i}" for i in range(races)],
+                "City": [f"City {i}" for i in range(races)],
+                "Circuit": [f"Circuit {i}" for i in range(races)],
+                "HasSprint": [i % 4 == 0 for i in range(races)],
+            }
+        ),
+    )
+    results = []
+    for i in range(races):
+        order = rng.permutation(20)
+        race = drivers.iloc[order].reset_index(drop=True)
+        race.insert(0, "Position", range(1, 21))
+        race["Points"] = (data.RACE_POINTS + [0] * 10)[:20]
+        race["FastestLap"] = [j == rng.integers(10) for j in range(20)]
+        results.append((f"Country {i}", "race", race))
+        if i % 4 == 0:
+            sprint = race.drop(columns="FastestLap")
+            sprint["Points"] = (data.SPRINT_POINTS + [0] * 12)[:20]
+            results.append((f"Country {i}", "sprint", sprint))
+    season_store.write_results(results)
+
+
+def bench(func, folder, n):
+    best = math.inf
+    for _ in range(n):
+        start = time.perf_counter()
+        result = func(folder)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=3)
+    parser.add_argument("--races", type=int, default=24, help="races per season")
+    parser.add_argument("-n", type=int, default=5, help="repetitions, best counts")
+    args = parser.parse_args()
+
+    backends = [name for name in store.BACKENDS if name != "parquet" or store.pa]
+    print(f"{'season':<8} {'loader':<22} {'ms':>8}")
+    with tempfile.TemporaryDirectory() as root:
+        for i in range(args.seasons):
+            year = str(2000 + i)
+            csv_folder = os.path.join(root, "csv", year)
+            write_season(store.CsvStore(csv_folder), year, args.races, seed=i)
+            for backend in backends:
+                folder = os.path.join(root, backend, year)
+                if backend != "csv":
+                    store.copy(
+                        store.CsvStore(csv_folder), store.BACKENDS[backend](folder)
+                    )
+
+            old_time, expected = bench(load_rows, csv_folder, args.n)
+            print(f"{year:<8} {'old loader (csv)':<22} {old_time * 1000:>8.1f}")
+            for backend in backends:
+                folder = os.path.join(root, backend, year)
+                load_time, loaded = bench(
+                    lambda folder: data.load_season(folder)[3], folder, args.n
+                )
+                assert np.array_equal(
+                    loaded["Points"].values, expected["Points"].values
+                ), f"{backend}: points differ"
+                print(
+                    f"{year:<8} {'load_season (' + backend + ')':<22} {load_time * 1000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
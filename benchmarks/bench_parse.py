@@ -0,0 +1,79 @@
+"""parse time per race page for the three parsing paths
+
+current: html.parser soup + pd.read_html of the table
+fast:    lxml pruned soup + read_table (data.FAST_PARSE)
+json:    embedded page json, no soup at all (data.EXTRACT_JSON)
+
+python -m benchmarks.bench_parse [-n 50] [--file page.html ...]
+
+without --file a synthetic page from benchmarks/fixtures.py is used, saved
+pages (e.g. from the page cache in offline mode) can be passed instead
+"""
+
+import argparse
+import time
+
+from benchmarks import fixtures
+from utils import data
+
+MODES = {
+    "current": dict(FAST_PARSE=False, EXTRACT_JSON=False),
+    "fast": dict(FAST_PARSE=True, EXTRACT_JSON=False),
+    "json": dict(FAST_PARSE=True, EXTRACT_JSON=True),
+}
+
+
+def parse(content, mode):
+    for name, value in MODES[mode].items():
+        setattr(data, name, value)
+    info, race, sprint_link = data.read_race_page("", content, "", with_results=True)
+    info["sprint_link"] = sprint_link
+    return info, data.refactor_df(race, drivers_df=data.RACE_DEFAULT)
+
+
+def bench(content, mode, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        parse(content, mode)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=50, help="repetitions per page")
+    parser.add_argument("--file", nargs="*", default=[], help="saved race pages")
+    args = parser.parse_args()
+
+    if args.file:
+        pages = {}
+        for path in args.file:
+            with open(path, encoding="utf-8") as file:
+                pages[path] = file.read().replace("\xa0", " ")
+    else:
+        race = fixtures.season_calendar(2024, sprint_every=1)[0]
+        pages = {
+            "synthetic": fixtures.race_page(2024, race),
+            "synthetic+json": fixtures.race_page(2024, race, embed_json=True),
+        }
+
+    print(f"{'page':<24} {'KiB':>5}" + "".join(f" {mode + ' ms':>11}" for mode in MODES))
+    for name, content in pages.items():
+        expected = parse(content, "current")
+        for mode in MODES:
+            info, race = parse(content, mode)
+            assert info == expected[0], f"{mode}: parsed race info differs"
+            assert race.astype(str).equals(expected[1].astype(str)), f"{mode}: tables differ"
+
+        data.reset_stats()
+        parse(content, "json")
+        json_path = data.get_stats().get("json_pages", 0) > 0
+        times = [bench(content, mode, args.n) for mode in MODES]
+        print(
+            f"{name[-24:]:<24} {len(content) / 1024:>5.0f}"
+            + "".join(f" {t * 1000:>11.2f}" for t in times)
+            + ("" if json_path else "  (no page json, dom fallback)")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""points over time of the dashboard, array kernel vs the pandas paths
+
+python -m benchmarks.bench_points [--seasons 1 50] [--races 24] [-n 5]
+
+writes a synthetic season (see bench_load) with seasons * races races, as
+the dashboard would chart a range that long, and times the points over time
+of drivers and teams three ways: get_points_over_time on the result rows
+(groupby, sort, pivot_table, cumsum and stack, as the dashboard did before
+the standings), the groupby, reindex and stack of the standings before
+Standings.points_over_time went to arrays (both kept below as reference) and
+Standings.points_over_time itself. the standings paths must give the same
+table.
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_load import write_season
+from utils import data, standings, store
+
+
+def get_points_over_time(results_df, entity="DriverName"):
+    """the dashboard before the standings, from the result rows"""
+    if entity == "DriverName":
+        summed_df = results_df.groupby(
+            ["Country", "EndDate", "TeamName", entity], observed=True
+        )["Points"].sum()
+    if entity == "TeamName":
+        summed_df = results_df.groupby(["Country", "EndDate", entity], observed=True)[
+            "Points"
+        ].sum()
+    summed_df = summed_df.reset_index().sort_values(
+        by=["EndDate", "TeamName", entity], ascending=[True, True, True]
+    )
+
+    piv_table = summed_df.pivot_table(
+        ["Points"], ["Country"], [entity], sort=False, observed=True
+    )
+    piv_table = piv_table.astype(float).fillna(0).cumsum(axis=0)
+    piv_table = piv_table.stack(future_stack=True).reset_index()
+    return piv_table
+
+
+def points_over_time_pandas(
+    season_standings, entity, start, end, teams=None, start_rows=None, start_date=None
+):
+    """Standings.points_over_time before the array kernel"""
+    mask = season_standings._mask(entity) & season_standings._mask("TeamName", teams)
+    per_race = season_standings.per_race(start, end)
+    race, pair = np.nonzero((per_race[:, :, 1] > 0) & mask)
+    races = season_standings.races.iloc[start : end + 1]
+    entries = pd.DataFrame(
+        {
+            "Country": races["Country"].to_numpy()[race],
+            "EndDate": races["EndDate"].to_numpy()[race],
+            "TeamName": season_standings.pairs["TeamName"].to_numpy()[pair],
+            entity: season_standings.pairs[entity].to_numpy()[pair],
+        }
+    )
+    if start_rows is not None:
+        start_rows = start_rows.dropna(subset=list({"TeamName", entity}))
+        entries = pd.concat(
+            [
+                pd.DataFrame(
+                    {
+                        "Country": "",
+                        "EndDate": start_date,
+                        "TeamName": start_rows["TeamName"].to_numpy(),
+                        entity: start_rows[entity].to_numpy(),
+                    }
+                ),
+                entries,
+            ]
+        )
+    entries = entries.sort_values(
+        list(dict.fromkeys(["EndDate", "TeamName", entity, "Country"])),
+        kind="stable",
+    )
+    countries = entries.drop_duplicates("Country")["Country"].tolist()
+    columns = entries.drop_duplicates(entity)[entity].tolist()
+
+    points = season_standings._by_entity(entity, per_race[:, :, 0], mask).T
+    points.index = races["Country"].to_numpy()
+    points = points.reindex(index=countries, columns=columns).fillna(0)
+    points = points.astype(float).cumsum(axis=0)
+    points.index.name = "Country"
+    points.columns.name = entity
+    return points.stack(future_stack=True).rename("Points").reset_index()
+
+
+def bench(func, n):
+    best = math.inf
+    for _ in range(n):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, nargs="+", default=[1, 50])
+    parser.add_argument("--races", type=int, default=24, help="races per season")
+    parser.add_argument("-n", type=int, default=5, help="repetitions, best counts")
+    args = parser.parse_args()
+
+    print(f"{'seasons':<8} {'entity':<11} {'path':<18} {'ms':>8}")
+    with tempfile.TemporaryDirectory() as root:
+        for seasons in args.seasons:
+            folder = os.path.join(root, str(seasons))
+            write_season(store.CsvStore(folder), "2000", seasons * args.races, seed=0)
+            races_df, _, drivers_df, results_df = data.load_season(folder)
+            season_standings = standings.load(folder)
+            last = len(season_standings.races) - 1
+            kwargs = dict(
+                start_rows=drivers_df[["DriverName", "TeamName"]],
+                start_date=races_df["StartDate"].min(),
+            )
+
+            for entity in ["DriverName", "TeamName"]:
+                paths = {
+                    "result rows": lambda: get_points_over_time(results_df, entity),
+                    "standings pandas": lambda: points_over_time_pandas(
+                        season_standings, entity, 0, last, **kwargs
+                    ),
+                    "standings arrays": lambda: season_standings.points_over_time(
+                        entity, 0, last, **kwargs
+                    ),
+                }
+                results = {}
+                for name, func in paths.items():
+                    best, results[name] = bench(func, args.n)
+                    print(f"{seasons:<8} {entity:<11} {name:<18} {best * 1000:>8.1f}")
+                pd.testing.assert_frame_equal(
+                    results["standings arrays"], results["standings pandas"]
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""end-to-end scraper benchmark against a local stand-in server
+
+python -m benchmarks.bench_scraper [--years 2023 2024] [--races 24] [--latency 0.02]
+                                   [--workers 8] [--json]
+
+serves the fixture pages from benchmarks/fixtures.py on localhost, points
+utils/data.py at it and runs get_locations, get_races, save_results_to_csv,
+get_drivers and get_teams per season. the page cache is switched off so
+every page is downloaded and parsed. reports pages, bytes, pages per second,
+parse time (summed over threads) and wall time per stage and season.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks import fixtures
+from benchmarks.server import FixtureServer
+from utils import data, fetch
+
+
+def run_stage(func, *args, **kwargs):
+    data.get_race_links.cache_clear()
+    data.reset_stats()
+    fetch.reset_stats()
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    fetched = fetch.get_stats()
+    return {
+        "pages": fetched.get("requests", 0),
+        "bytes": fetched.get("bytes", 0),
+        "parse": data.get_stats().get("parse_seconds", 0.0),
+        "time": elapsed,
+    }
+
+
+def bench_season(year, folder, workers):
+    os.makedirs(folder, exist_ok=True)
+    data.get_drivers(year).to_csv(folder + "/drivers.csv", index=False)
+    return {
+        "get_locations": run_stage(data.get_locations, year, workers=workers),
+        "get_races": run_stage(data.get_races, year, workers=workers),
+        "save_results_to_csv": run_stage(
+            data.save_results_to_csv, folder, year, workers=workers
+        ),
+        "get_drivers": run_stage(data.get_drivers, year),
+        "get_teams": run_stage(data.get_teams, year),
+    }
+
+
+def print_row(label, stage, result):
+    pages_per_second = result["pages"] / result["time"] if result["time"] else 0
+    print(
+        f"{label:<8} {stage:<20} {result['pages']:>6} {result['bytes'] / 1024:>9.0f} "
+        f"{pages_per_second:>8.1f} {result['parse']:>8.3f} {result['time']:>8.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", nargs="+", default=["2023", "2024"])
+    parser.add_argument("--races", type=int, default=24, help="races per season")
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="simulated round trip in s"
+    )
+    parser.add_argument("--workers", type=int, default=data.FETCH_WORKERS)
+    parser.add_argument(
+        "--json", action="store_true", help="embed __NEXT_DATA__ in the race pages"
+    )
+    args = parser.parse_args()
+
+    pages = fixtures.site(args.years, n_races=args.races, embed_json=args.json)
+    server = FixtureServer(pages, latency=args.latency).start()
+    data.set_base_url(server.url)
+    fetch.configure_cache(enabled=False)
+
+    print(
+        f"{'season':<8} {'stage':<20} {'pages':>6} {'KiB':>9} "
+        f"{'pages/s':>8} {'parse s':>8} {'wall s':>8}"
+    )
+    with tempfile.TemporaryDirectory() as folder:
+        for year in args.years:
+            results = bench_season(year, os.path.join(folder, year), args.workers)
+            for stage, result in results.items():
+                print_row(year, stage, result)
+            total = {
+                key: sum(result[key] for result in results.values())
+                for key in ["pages", "bytes", "parse", "time"]
+            }
+            print_row(year, "total", total)
+        current = {
+            "get_drivers": run_stage(data.get_drivers, "Current"),
+            "get_teams": run_stage(data.get_teams, "Current"),
+        }
+        for stage, result in current.items():
+            print_row("Current", stage, result)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
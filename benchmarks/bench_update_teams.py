@@ -0,0 +1,100 @@
+"""update_teams on a large synthetic multi-season results frame
+
+python -m benchmarks.bench_update_teams [--seasons 50] [--races 24] [-n 3]
+
+compares the old row by row loop (kept below as reference) with the
+vectorized update_teams in utils/data.py and checks both fill in the same
+team names. a tenth of the rows already has a team, which must be kept,
+and some drivers are not in drivers.csv.
+"""
+
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import data
+
+
+def update_teams_rows(df, drivers_df):
+    """update_teams before it was vectorized"""
+    for i, row in df.iterrows():
+        driver = row["DriverName"]
+        team = row["TeamName"]
+        if driver is not None and isinstance(driver, str):
+
+            driver_row = drivers_df[drivers_df["DriverName"] == driver]
+            if len(driver_row) < 1:
+                continue
+            if team is None or (isinstance(team, float) and math.isnan(team)):
+                team = driver_row["TeamName"].values[0]
+                df.loc[i, "TeamName"] = team
+    return df
+
+
+def make_frames(seasons, races, drivers=22, seed=0):
+    rng = np.random.default_rng(seed)
+    names = [f"Driver {i}" for i in range(drivers * 3)]
+    drivers_df = pd.DataFrame(
+        {
+            "DriverName": names[: drivers * 2],
+            "TeamName": [f"Team {i // 2 % 10}" for i in range(drivers * 2)],
+        }
+    )
+    rows = seasons * races * 20
+    df = pd.DataFrame(
+        {
+            "Position": np.tile(np.arange(1, 21), seasons * races),
+            "DriverName": rng.choice(names, rows),
+            "TeamName": None,
+            "Points": rng.integers(0, 26, rows),
+        }
+    )
+    df["TeamName"] = df["TeamName"].astype(object)
+    kept = rng.random(rows) < 0.1
+    df.loc[kept, "TeamName"] = "Kept Team"
+    return df, drivers_df
+
+
+def bench(func, df, drivers_df, n):
+    best = math.inf
+    for _ in range(n):
+        frame = df.copy()
+        start = time.perf_counter()
+        result = func(frame, drivers_df)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seasons", type=int, default=50)
+    parser.add_argument("--races", type=int, default=24)
+    parser.add_argument("-n", type=int, default=3, help="repetitions, best counts")
+    parser.add_argument(
+        "--rows-seasons",
+        type=int,
+        default=2,
+        help="seasons for the slow row by row loop, timed and scaled up",
+    )
+    args = parser.parse_args()
+
+    df, drivers_df = make_frames(args.seasons, args.races)
+    small = df.iloc[: args.rows_seasons * args.races * 20]
+
+    rows_time, expected = bench(update_teams_rows, small, drivers_df, 1)
+    _, result = bench(data.update_teams, small, drivers_df, 1)
+    assert result["TeamName"].equals(expected["TeamName"]), "team names differ"
+
+    vectorized_time, _ = bench(data.update_teams, df, drivers_df, args.n)
+    rows_time *= len(df) / len(small)
+    print(f"{len(df)} rows, {args.seasons} seasons")
+    print(f"{'iterrows (scaled)':<20} {rows_time:>10.3f} s")
+    print(f"{'vectorized':<20} {vectorized_time:>10.4f} s")
+    print(f"{'speedup':<20} {rows_time / vectorized_time:>10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
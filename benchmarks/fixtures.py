@@ -0,0 +1,310 @@
+"""synthetic pages with the same structure as the formula1.com results pages
+
+only the parts the scrapers in utils/data.py look at are modelled exactly,
+the rest is filler (navigation, inline scripts) so that page size and tag
+count are in the range of the real pages
+"""
+
+import json
+import random
+from datetime import date, timedelta
+
+DRIVERS = [
+    ("Max", "Verstappen", "VER", "Red Bull Racing Honda RBPT"),
+    ("Sergio", "Perez", "PER", "Red Bull Racing Honda RBPT"),
+    ("Lando", "Norris", "NOR", "McLaren Mercedes"),
+    ("Oscar", "Piastri", "PIA", "McLaren Mercedes"),
+    ("Charles", "Leclerc", "LEC", "Ferrari"),
+    ("Carlos", "Sainz", "SAI", "Ferrari"),
+    ("Lewis", "Hamilton", "HAM", "Mercedes"),
+    ("George", "Russell", "RUS", "Mercedes"),
+    ("Fernando", "Alonso", "ALO", "Aston Martin Aramco Mercedes"),
+    ("Lance", "Stroll", "STR", "Aston Martin Aramco Mercedes"),
+    ("Pierre", "Gasly", "GAS", "Alpine Renault"),
+    ("Esteban", "Ocon", "OCO", "Alpine Renault"),
+    ("Alexander", "Albon", "ALB", "Williams Mercedes"),
+    ("Logan", "Sargeant", "SAR", "Williams Mercedes"),
+    ("Yuki", "Tsunoda", "TSU", "RB Honda RBPT"),
+    ("Daniel", "Ricciardo", "RIC", "RB Honda RBPT"),
+    ("Valtteri", "Bottas", "BOT", "Kick Sauber Ferrari"),
+    ("Guanyu", "Zhou", "ZHO", "Kick Sauber Ferrari"),
+    ("Nico", "Hulkenberg", "HUL", "Haas Ferrari"),
+    ("Kevin", "Magnussen", "MAG", "Haas Ferrari"),
+]
+TEAMS = list(dict.fromkeys(team for *_, team in DRIVERS))
+TEAM_COLORS = ["3671C6", "FF8000", "E8002D", "27F4D2", "229971",
+               "FF87BC", "64C4FF", "6692FF", "52E252", "B6BABD"]
+LOCATIONS = [
+    ("Bahrain", "Sakhir", "Bahrain International Circuit"),
+    ("Saudi Arabia", "Jeddah", "Jeddah Corniche Circuit"),
+    ("Australia", "Melbourne", "Albert Park Circuit"),
+    ("Japan", "Suzuka", "Suzuka International Racing Course"),
+    ("China", "Shanghai", "Shanghai International Circuit"),
+    ("Miami", "Miami", "Miami International Autodrome"),
+    ("Emilia-Romagna", "Imola", "Autodromo Enzo e Dino Ferrari"),
+    ("Monaco", "Monte Carlo", "Circuit de Monaco"),
+    ("Canada", "Montreal", "Circuit Gilles-Villeneuve"),
+    ("Spain", "Barcelona", "Circuit de Barcelona-Catalunya"),
+    ("Austria", "Spielberg", "Red Bull Ring"),
+    ("Great Britain", "Silverstone", "Silverstone Circuit"),
+    ("Hungary", "Budapest", "Hungaroring"),
+    ("Belgium", "Spa-Francorchamps", "Circuit de Spa-Francorchamps"),
+    ("Netherlands", "Zandvoort", "Circuit Zandvoort"),
+    ("Italy", "Monza", "Autodromo Nazionale Monza"),
+    ("Azerbaijan", "Baku", "Baku City Circuit"),
+    ("Singapore", "Marina Bay", "Marina Bay Street Circuit"),
+    ("United States", "Austin", "Circuit of the Americas"),
+    ("Mexico", "Mexico City", "Autodromo Hermanos Rodriguez"),
+    ("Brazil", "Sao Paulo", "Autodromo Jose Carlos Pace"),
+    ("Las Vegas", "Las Vegas", "Las Vegas Strip Circuit"),
+    ("Qatar", "Lusail", "Lusail International Circuit"),
+    ("Abu Dhabi", "Yas Marina", "Yas Marina Circuit"),
+]
+RACE_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+SPRINT_POINTS = [8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def slug(name):
+    return name.lower().replace(" ", "-")
+
+
+def season_calendar(year, n_races=24, sprint_every=4):
+    """races of a synthetic season, every `sprint_every`th one with a sprint"""
+    start = date(int(year), 3, 1)
+    races = []
+    for index in range(n_races):
+        country, city, circuit = LOCATIONS[index % len(LOCATIONS)]
+        if index >= len(LOCATIONS):
+            country = f"{country} {index // len(LOCATIONS) + 1}"
+        end = start + timedelta(weeks=index, days=2)
+        races.append(
+            {
+                "index": 1000 + index,
+                "country": country,
+                "city": city,
+                "circuit": circuit,
+                "start": end - timedelta(days=2),
+                "end": end,
+                "sprint": sprint_every > 0 and index % sprint_every == sprint_every - 1,
+            }
+        )
+    return races
+
+
+def race_link(year, race, session="race-result"):
+    return f"/en/results/{year}/races/{race['index']}/{slug(race['country'])}/{session}"
+
+
+def _filler(rng, size):
+    """navigation and inline script noise of roughly `size` bytes"""
+    nav = "".join(
+        f'<li><div class="nav-item"><a href="/en/page-{i}" class="nav-link">'
+        f"<span>Item {i}</span></a></div></li>"
+        for i in range(size // 400)
+    )
+    script = "".join(
+        f'{{"k{i}":"{rng.getrandbits(64):x}","v":[{i},{i + 1},{i + 2}]}},'
+        for i in range(size // 80)
+    )
+    return f"<nav><ul>{nav}</ul></nav><script>window.__data=[{script}];</script>"
+
+
+def _page(title, body, rng, size):
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{title}</title></head><body>{_filler(rng, size // 2)}"
+        f"<main>{body}</main>{_filler(rng, size // 2)}</body></html>"
+    )
+
+
+def _driver_cell(first, last, code):
+    return (
+        f'<td><span class="max-lg:hidden">{first}</span> '
+        f'<span class="max-md:hidden">{last}</span><span class="md:hidden">{code}</span></td>'
+    )
+
+
+def _results(rng, points, laps):
+    """result rows of one session: position, number, driver, team, laps, time, points"""
+    order = rng.sample(DRIVERS, len(DRIVERS))
+    fastest = rng.randrange(len(points))
+    rows = []
+    for pos, driver in enumerate(order, start=1):
+        pts = points[pos - 1] if pos <= len(points) else 0
+        if pos - 1 == fastest:
+            pts += 1
+        position = pos if pos < len(order) else "NC"
+        time = f"+{rng.randrange(1, 90)}.{rng.randrange(999):03d}s"
+        rows.append((position, rng.randrange(1, 99), driver, laps, time, pts))
+    return rows
+
+
+def _results_table(results):
+    rows = "".join(
+        f"<tr><td>{position}</td><td>{number}</td>{_driver_cell(first, last, code)}"
+        f"<td>{team}</td><td>{laps}</td><td>{time}</td><td>{pts}</td></tr>"
+        for position, number, (first, last, code, team), laps, time, pts in results
+    )
+    header = "".join(
+        f"<th><p>{name}</p></th>"
+        for name in ["Pos", "No", "Driver", "Car", "Laps", "Time/retired", "Pts"]
+    )
+    return f"<table><thead><tr>{header}</tr></thead><tbody>{rows}</tbody></table>"
+
+
+def _next_data(race, results):
+    """__NEXT_DATA__ script with the same race info and results as the html"""
+    payload = {
+        "props": {
+            "pageProps": {
+                "meeting": {
+                    "meetingName": race["country"],
+                    "meetingStartDate": race["start"].isoformat(),
+                    "meetingEndDate": race["end"].isoformat(),
+                    "meetingLocation": race["city"],
+                    "circuitShortName": race["circuit"],
+                },
+                "results": [
+                    {
+                        "positionText": str(position),
+                        "racingNumber": number,
+                        "driverFirstName": first,
+                        "driverLastName": last,
+                        "driverTLA": code,
+                        "teamName": team,
+                        "lapsCompleted": laps,
+                        "raceTime": time,
+                        "racePoints": pts,
+                    }
+                    for position, number, (first, last, code, team), laps, time, pts in results
+                ],
+            }
+        }
+    }
+    return (
+        '<script id="__NEXT_DATA__" type="application/json">'
+        f"{json.dumps(payload)}</script>"
+    )
+
+
+def race_page(year, race, sprint=False, size=120_000, embed_json=False):
+    """race (or sprint) result page of one race weekend
+
+    embed_json adds the data as __NEXT_DATA__ like a server rendered page
+    """
+    rng = random.Random(f"{year}-{race['index']}-{sprint}")
+    start, end = race["start"], race["end"]
+    if start.month == end.month:
+        dates = f"{start.day:02d} - {end.strftime('%d %b %Y')}"
+    else:
+        dates = f"{start.strftime('%d %b')} - {end.strftime('%d %b %Y')}"
+    sessions = ["race-result", "fastest-laps", "pit-stop-summary", "starting-grid",
+                "qualifying", "practice/3", "practice/2", "practice/1"]
+    if race["sprint"]:
+        sessions[1:1] = ["sprint-results", "sprint-grid", "sprint-qualifying"]
+    session_links = "".join(
+        f'<li><a href="{race_link(year, race, session)}" class="block">{session}</a></li>'
+        for session in sessions
+    )
+    points = SPRINT_POINTS if sprint else RACE_POINTS
+    results = _results(rng, points, 19 if sprint else 57)
+    body = (
+        f"<p>Results</p><p>{year}</p><p>{'SPRINT' if sprint else 'RACE RESULT'}</p>"
+        f"<p>{dates}</p><p>{race['circuit']}, {race['city']}</p>"
+        f"<ul>{session_links}</ul>"
+        f"{_results_table(results)}"
+    )
+    if embed_json:
+        body += _next_data(race, results)
+    return _page(f"{race['country']} {year}", body, rng, size)
+
+
+def season_index_page(year, races, size=120_000):
+    """list of all races of a season, links to the race results"""
+    rng = random.Random(f"{year}-index")
+    rows = "".join(
+        f'<tr><td><p><a href="{race_link(year, race)}" class="block">{race["country"]}</a></p></td>'
+        f"<td>{race['end'].strftime('%d %b')}</td><td>{DRIVERS[0][0]} {DRIVERS[0][1]}</td></tr>"
+        for race in races
+    )
+    body = f"<table><tr><th>Grand prix</th><th>Date</th><th>Winner</th></tr>{rows}</table>"
+    return _page(f"{year} races", body, rng, size)
+
+
+def archive_index_page(years, size=60_000):
+    """results archive start page with one link per season"""
+    rng = random.Random("archive")
+    links = "".join(
+        f'<li><a href="/en/results/{year}/races" class="block">{year}</a></li>'
+        for year in sorted(years, reverse=True)
+    )
+    return _page("results archive", f"<ul>{links}</ul>", rng, size)
+
+
+def drivers_standings_page(year, size=80_000):
+    """archive driver standings table of a season"""
+    rng = random.Random(f"{year}-drivers")
+    rows = "".join(
+        f"<tr><td>{pos}</td>{_driver_cell(first, last, code)}<td>NED</td>"
+        f"<td>{team}</td><td>{rng.randrange(400)}</td></tr>"
+        for pos, (first, last, code, team) in enumerate(DRIVERS, start=1)
+    )
+    header = "".join(
+        f"<th>{name}</th>" for name in ["Pos", "Driver", "Nationality", "Car", "Pts"]
+    )
+    body = f"<table><tr>{header}</tr>{rows}</table>"
+    return _page(f"{year} drivers", body, rng, size)
+
+
+def teams_standings_page(year, size=60_000):
+    """archive team standings table of a season"""
+    rng = random.Random(f"{year}-teams")
+    rows = "".join(
+        f"<tr><td>{pos}</td><td>{team}</td><td>{rng.randrange(800)}</td></tr>"
+        for pos, team in enumerate(TEAMS, start=1)
+    )
+    body = f"<table><tr><th>Pos</th><th>Team</th><th>Pts</th></tr>{rows}</table>"
+    return _page(f"{year} teams", body, rng, size)
+
+
+def drivers_page(size=150_000):
+    """current drivers overview, one a.group card per driver"""
+    rng = random.Random("drivers")
+    cards = "".join(
+        f'<a href="/en/drivers/{slug(first)}-{slug(last)}" class="group focus">'
+        f"<div><p>{first}</p><p>{last}</p><p>{team}</p></div></a>"
+        for first, last, _, team in DRIVERS
+    )
+    return _page("drivers", cards, rng, size)
+
+
+def teams_page(size=150_000):
+    """current teams overview, one a.group card per team with its colour class"""
+    rng = random.Random("teams")
+    cards = "".join(
+        f'<a href="/en/teams/{slug(team)}" class="group focus">'
+        f'<div class="flex text-{color}"><span>{team}</span></div></a>'
+        for team, color in zip(TEAMS, TEAM_COLORS)
+    )
+    return _page("teams", cards, rng, size)
+
+
+def site(years, n_races=24, sprint_every=4, embed_json=False):
+    """path -> html of every page the scrapers read for the given seasons"""
+    pages = {
+        "/en/results/": archive_index_page(years),
+        "/en/drivers": drivers_page(),
+        "/en/teams": teams_page(),
+    }
+    for year in years:
+        races = season_calendar(year, n_races, sprint_every)
+        pages[f"/en/results/{year}/races"] = season_index_page(year, races)
+        pages[f"/en/results/{year}/drivers"] = drivers_standings_page(year)
+        pages[f"/en/results/{year}/team"] = teams_standings_page(year)
+        for race in races:
+            pages[race_link(year, race)] = race_page(year, race, embed_json=embed_json)
+            if race["sprint"]:
+                pages[race_link(year, race, "sprint-results")] = race_page(
+                    year, race, sprint=True, embed_json=embed_json
+                )
+    return pages
@@ -0,0 +1,74 @@
+"""local stand-in for formula1.com serving fixture pages
+
+the scrapers are pointed at it with data.set_base_url(url) (or the
+F1_BASE_URL environment variable), latency simulates the network round trip
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, pages, latency=0.0, host="127.0.0.1", port=0):
+        self.pages = {path: html.encode("utf-8") for path, html in pages.items()}
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        super().__init__((host, port), FixtureHandler)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        body = server.pages.get(unquote(urlsplit(self.path).path))
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        with server._lock:
+            server.requests += 1
+            server.bytes_sent += len(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from benchmarks import fixtures
+
+    parser = argparse.ArgumentParser(description="Serve fixture pages.")
+    parser.add_argument("years", nargs="+", type=int)
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FixtureServer(
+        fixtures.site(args.years), latency=args.latency, port=args.port
+    )
+    print(f"serving {len(server.pages)} pages on {server.url}")
+    server.serve_forever()
@@ -0,0 +1,82 @@
+import plotly.express as px
+import streamlit as st
+from utils import career, func, style
+
+# seasons shown when the page opens, older ones load when the range grows
+DEFAULT_SEASONS = 10
+# bars in the driver and team charts
+TOP_N = 20
+
+
+def bar_chart(careers, entity, metric):
+    top = careers.sort_values(metric, ascending=False, kind="stable").head(TOP_N)
+    fig = px.bar(top, x=entity, y=metric, color_discrete_sequence=["#b73a3a"])
+    fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), xaxis_title=None)
+    return fig
+
+
+def main():
+    st.title("Career")
+    seasons = career.seasons(func.DATA_FOLDER)
+    if not seasons:
+        st.warning("No seasons found. Please configure the data in Config tab.")
+        st.stop()
+
+    with st.sidebar:
+        if len(seasons) > 1:
+            first, last = st.select_slider(
+                "Seasons",
+                options=seasons,
+                value=(seasons[-min(DEFAULT_SEASONS, len(seasons))], seasons[-1]),
+            )
+        else:
+            first = last = seasons[0]
+        metric = st.radio("Metric", ["Points", "Wins", "Podiums"], horizontal=True)
+    selected = seasons[seasons.index(first) : seasons.index(last) + 1]
+
+    summary = career.summary(func.DATA_FOLDER, selected)
+    if summary.empty:
+        st.info("No results in the selected seasons yet.")
+        st.stop()
+    st.sidebar.caption(f"{len(selected)} seasons loaded")
+
+    driver_tab, team_tab, history_tab = st.tabs(["Drivers", "Teams", "Team History"])
+    with driver_tab:
+        drivers = career.driver_careers(summary)
+        st.plotly_chart(bar_chart(drivers, "DriverName", metric))
+        st.dataframe(drivers, hide_index=True, use_container_width=True)
+
+    with team_tab:
+        teams = career.team_careers(summary)
+        st.plotly_chart(bar_chart(teams, "TeamName", metric))
+        st.dataframe(teams, hide_index=True, use_container_width=True)
+
+    with history_tab:
+        history = career.team_history(summary)
+        selected_teams = st.multiselect(
+            "Teams",
+            options=teams["TeamName"].tolist(),
+            default=teams["TeamName"].head(5).tolist(),
+        )
+        history = history[history["TeamName"].isin(selected_teams)]
+        cols = st.columns(2)
+        points_graph = px.line(
+            history, x="Season", y=metric, color="TeamName", markers=True
+        )
+        points_graph.update_layout(xaxis_title=None, legend_title_text=None)
+        cols[0].plotly_chart(points_graph)
+        position_graph = px.line(
+            history, x="Season", y="Position", color="TeamName", markers=True
+        )
+        position_graph.update_layout(
+            xaxis_title=None,
+            legend_title_text=None,
+            yaxis=dict(autorange="reversed"),
+        )
+        cols[1].plotly_chart(position_graph)
+        st.dataframe(history, hide_index=True, use_container_width=True)
+
+
+if __name__ == "__main__":
+    style.set_page_config()
+    main()
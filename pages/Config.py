@@ -1,16 +1,28 @@
 import os
 
 import streamlit as st
-from utils import Drivers, Races, Results, Teams, data, func, style
+from utils import Drivers, Races, Results, Teams, data, fetch, func, index, style
 
 DATA_FOLDER = "./data"
 
 
 def main():
     with st.sidebar:
+        # for this session and the jobs it starts, the default is in Settings
+        offline = st.toggle(
+            "Offline",
+            value=fetch.OFFLINE,
+            key="offline",
+            help="Only use pages from the local page cache, never download.",
+        )
+        try:
+            with fetch.offline_mode(offline):
+                available_years = data.get_available_years()
+        except fetch.PageNotCached:
+            available_years = []
         st.selectbox(
             "Fetch from ...",
-            ["Current"] + data.get_available_years(),
+            ["Current"] + available_years,
             key="year_to_fetch",
         )
     # Ensure the base directory exists
@@ -67,6 +79,7 @@ def main():
     if not saved_seasons:
         st.info("Please create a new season.")
         st.stop()
+    st.caption(index.describe(index.season(DATA_FOLDER, selected_season)))
 
     # tabs for races, teams, drivers, results
     tabs = st.tabs(["Races", "Teams", "Drivers", "Results"])
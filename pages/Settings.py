@@ -1,5 +1,6 @@
 import streamlit as st
 import toml
+from utils import cache, fetch, func, jobs, store
 
 SETTINGS_FILE = "./settings.toml"
 
@@ -29,12 +30,52 @@ def main():
         "Data Folder",
         value=settings["dashboard"].get("data_folder", "./data"),
     )
+    backends = list(store.BACKENDS)
+    storage = st.selectbox(
+        "Storage",
+        backends,
+        index=backends.index(settings["dashboard"].get("storage", store.BACKEND)),
+        help="Layout of new seasons. csv: one file per table and race, "
+        "parquet: one file per season (needs pyarrow), "
+        "sqlite: one database for all seasons.",
+    )
+    cache_mb = st.number_input(
+        "Season Cache (MB)",
+        min_value=16,
+        step=16,
+        value=int(settings["dashboard"].get("cache_mb", cache.SEASON_CACHE_MB)),
+        help="Memory for season data shared by all sessions, "
+        "the least recently used seasons are dropped first.",
+    )
+    offline = st.toggle(
+        "Offline",
+        value=settings["dashboard"].get("offline", fetch.OFFLINE),
+        help="Only use pages from the local page cache, never download. "
+        "The default for all sessions, the Config page can change it for one.",
+    )
+    stats = cache.get_season_cache().stats()
+    st.caption(
+        f"{stats['entries']} cached, {stats['size'] / 2**20:.1f} of "
+        f"{stats['budget'] / 2**20:.0f} MB used, {stats['hits']} hits, "
+        f"{stats['misses']} misses, {stats['evictions']} evictions"
+    )
 
     # Save button
     if st.button("Save Settings"):
         settings["dashboard"]["data_folder"] = data_folder
+        settings["dashboard"]["storage"] = storage
+        settings["dashboard"]["cache_mb"] = cache_mb
+        settings["dashboard"]["offline"] = offline
         save_settings(settings)
+        store.configure(storage)
+        cache.configure(cache_mb)
+        fetch.configure_cache(offline=offline)
         st.success("Settings saved successfully!")
 
+    # converted in a background job, one season after the other
+    if st.button(f"Convert all seasons to {storage}"):
+        jobs.get_runner().submit("migrate", data_folder, storage=storage)
+    func.show_jobs(data_folder, ["migrate"])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
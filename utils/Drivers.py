@@ -1,8 +1,6 @@
-import os
-
 import pandas as pd
 import streamlit as st
-from utils import data, style
+from utils import func, store, style
 
 
 def main(data_folder, selected_season):
@@ -10,24 +8,33 @@ def main(data_folder, selected_season):
     st.title(f"Driver Data Configuration - {selected_season}")
 
     drivers_data_editor_nr = st.session_state.setdefault("drivers_data_editor_nr", 0)
-    if f"drivers_df_{DATA_FOLDER}" not in st.session_state:
-        if os.path.exists(DATA_FOLDER + "/drivers.csv"):
-            st.session_state[f"drivers_df_{DATA_FOLDER}"] = pd.read_csv(
-                DATA_FOLDER + "/drivers.csv", dtype={"DriverName": str, "TeamName": str}
+    version_key = f"drivers_version_{DATA_FOLDER}"
+    editor_key = f"driver_editor_{DATA_FOLDER}_{drivers_data_editor_nr}"
+    # the session only has a frame of its own after loading a fetched one,
+    # otherwise the table is a view of the one shared by all sessions
+    drivers_df = st.session_state.get(f"drivers_df_{DATA_FOLDER}")
+    if drivers_df is None:
+        if func.unedited(editor_key):
+            # nothing to lose yet, follow the saves of others. taken first, a
+            # save between the two reads shows up as a conflict
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).version(
+                "drivers"
             )
-        else:
-            st.session_state[f"drivers_df_{DATA_FOLDER}"] = pd.DataFrame(
-                columns=["DriverName", "TeamName"]
+        try:
+            drivers_df = func.cached_table(
+                DATA_FOLDER, "drivers", dtype={"DriverName": str, "TeamName": str}
             )
+        except FileNotFoundError:
+            drivers_df = pd.DataFrame(columns=["DriverName", "TeamName"])
     try:
-        df_teams = pd.read_csv(DATA_FOLDER + "/teams.csv")
+        df_teams = func.cached_table(DATA_FOLDER, "teams")
     except FileNotFoundError:
         st.warning("Teams data not found. Please configure the data in the Teams tab.")
         st.stop()
 
     st.header("Edit Drivers")
     drivers_df = st.data_editor(
-        st.session_state[f"drivers_df_{DATA_FOLDER}"],
+        drivers_df,
         num_rows="dynamic",
         use_container_width=True,
         column_config={
@@ -35,7 +42,7 @@ def main(data_folder, selected_season):
                 "TeamName", options=sorted(df_teams["TeamName"].tolist()), required=True
             ),
         },
-        key=f"driver_editor_{DATA_FOLDER}_{drivers_data_editor_nr}",
+        key=editor_key,
     )
 
     col1, col2, _ = st.columns([1, 1, 1])
@@ -44,17 +51,29 @@ def main(data_folder, selected_season):
     with col2:
         fetch_button = st.button("Fetch Drivers from API")
 
+    def reload():
+        st.session_state.pop(f"drivers_df_{DATA_FOLDER}", None)
+        st.session_state.drivers_data_editor_nr += 1
+
     if save_button:
-        drivers_df.to_csv(DATA_FOLDER + "/drivers.csv", index=False)
-        st.session_state[f"drivers_df_{DATA_FOLDER}"] = drivers_df
-        st.success("Data saved.")
-    if fetch_button:
-        with st.spinner("Fetching data..."):
-            st.session_state[f"drivers_df_{DATA_FOLDER}"] = data.get_drivers(
-                year_to_fetch=st.session_state.year_to_fetch
+        try:
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).write_table(
+                "drivers", drivers_df, expected=st.session_state.get(version_key)
             )
-            st.session_state.drivers_data_editor_nr += 1
-        st.rerun()
+        except store.WriteConflict as error:
+            func.show_conflict(error, reload)
+        else:
+            # a fresh editor on the saved table
+            reload()
+            st.success("Data saved.")
+    if fetch_button:
+        func.submit_fetch("drivers", DATA_FOLDER)
+
+    def load_fetched(drivers_df):
+        st.session_state[f"drivers_df_{DATA_FOLDER}"] = drivers_df
+        st.session_state.drivers_data_editor_nr += 1
+
+    func.show_jobs(DATA_FOLDER, ("drivers",), on_result=load_fetched)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,7 @@
-import os
-
 import numpy as np
 import pandas as pd
 import streamlit as st
-from utils import data, style
+from utils import func, store, style
 
 
 def main(data_folder, selected_season):
@@ -12,15 +10,26 @@ def main(data_folder, selected_season):
     st.title(f"Race Data Configuration - {selected_season}")
 
     races_data_editor_nr = st.session_state.setdefault("races_data_editor_nr", 0)
-    if f"races_df_{DATA_FOLDER}" not in st.session_state:
-        if os.path.exists(DATA_FOLDER + "/races.csv"):
-            st.session_state[f"races_df_{DATA_FOLDER}"] = pd.read_csv(
-                DATA_FOLDER + "/races.csv",
-                parse_dates=["StartDate", "EndDate"],
+    version_key = f"races_version_{DATA_FOLDER}"
+    editor_key = f"races_editor_{DATA_FOLDER}_{races_data_editor_nr}"
+    # the session only has a frame of its own after loading a fetched one,
+    # otherwise the table is a view of the one shared by all sessions
+    races_df = st.session_state.get(f"races_df_{DATA_FOLDER}")
+    if races_df is None:
+        if func.unedited(editor_key):
+            # nothing to lose yet, follow the saves of others. taken first, a
+            # save between the two reads shows up as a conflict
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).version(
+                "races"
+            )
+        try:
+            races_df = func.cached_table(
+                DATA_FOLDER,
+                "races",
                 dtype={"Country": str, "City": str, "Circuit": str, "HasSprint": bool},
             )
-        else:
-            st.session_state[f"races_df_{DATA_FOLDER}"] = pd.DataFrame(
+        except FileNotFoundError:
+            races_df = pd.DataFrame(
                 columns=[
                     "StartDate",
                     "EndDate",
@@ -33,7 +42,7 @@ def main(data_folder, selected_season):
 
     st.header("Edit Races")
     races_df = st.data_editor(
-        st.session_state[f"races_df_{DATA_FOLDER}"],
+        races_df,
         num_rows="dynamic",
         use_container_width=True,
         column_config={
@@ -47,7 +56,7 @@ def main(data_folder, selected_season):
                 "HasSprint", required=False, width="small"
             ),
         },
-        key=f"races_editor_{DATA_FOLDER}_{races_data_editor_nr}",
+        key=editor_key,
     )
 
     col1, col2, _ = st.columns([1, 1, 1])
@@ -55,17 +64,30 @@ def main(data_folder, selected_season):
         save_button = st.button("Save Races to file")
     with col2:
         fetch_button = st.button("Fetch Races from API")
+
+    def reload():
+        st.session_state.pop(f"races_df_{DATA_FOLDER}", None)
+        st.session_state.races_data_editor_nr += 1
+
     if save_button:
-        races_df.to_csv(DATA_FOLDER + "/races.csv", index=False)
-        st.session_state[f"races_df_{DATA_FOLDER}"] = races_df
-        st.success("Data saved.")
-    if fetch_button:
-        with st.spinner("Fetching data..."):
-            st.session_state[f"races_df_{DATA_FOLDER}"] = data.get_races(
-                year_to_fetch=st.session_state.year_to_fetch
+        try:
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).write_table(
+                "races", races_df, expected=st.session_state.get(version_key)
             )
-            st.session_state.races_data_editor_nr += 1
-        st.rerun()
+        except store.WriteConflict as error:
+            func.show_conflict(error, reload)
+        else:
+            # a fresh editor on the saved table
+            reload()
+            st.success("Data saved.")
+    if fetch_button:
+        func.submit_fetch("races", DATA_FOLDER)
+
+    def load_fetched(races_df):
+        st.session_state[f"races_df_{DATA_FOLDER}"] = races_df
+        st.session_state.races_data_editor_nr += 1
+
+    func.show_jobs(DATA_FOLDER, ("races",), on_result=load_fetched)
 
 
 if __name__ == "__main__":
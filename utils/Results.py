@@ -1,8 +1,9 @@
-import os
-
 import pandas as pd
 import streamlit as st
 import utils.data as data
+import utils.func as func
+import utils.standings as standings
+import utils.store as store
 import utils.style as style
 
 DATA_FOLDER = "./data"
@@ -13,19 +14,17 @@ def main(data_folder, selected_season):
     # Create a Streamlit app with sub-tabs for each race
     st.title(f"Race Results - {selected_season}")
     # Load the races from the CSV file
+    season_store = store.get_store(DATA_FOLDER)
     try:
-        races_df = pd.read_csv(DATA_FOLDER + "/races.csv")
-        drivers_df = pd.read_csv(DATA_FOLDER + "/drivers.csv")
-        teams_df = pd.read_csv(DATA_FOLDER + "/teams.csv")
+        races_df = func.cached_table(DATA_FOLDER, "races")
+        drivers_df = func.cached_table(DATA_FOLDER, "drivers")
+        teams_df = func.cached_table(DATA_FOLDER, "teams")
     except FileNotFoundError:
         st.warning("Data not found. Please configure the data in apropiate tabs.")
         st.stop()
     # Create a list of race names
     race_names = races_df["Country"].tolist()
 
-    # folder
-    os.makedirs(DATA_FOLDER + "/races", exist_ok=True)
-
     cols = st.columns([12, 2])
     with cols[0]:
         race_name = st.selectbox(
@@ -42,29 +41,36 @@ def main(data_folder, selected_season):
                 unsafe_allow_html=True,
             )
             if st.button("Do it!"):
-                with st.spinner("Fetching Results..."):
-                    data.save_results_to_csv(
-                        datafolder=DATA_FOLDER,
-                        year_to_fetch=st.session_state.year_to_fetch,
-                    )
-                    st.rerun()
+                func.submit_fetch("results", DATA_FOLDER)
+            st.divider()
+            st.markdown(
+                "Only fetch finished races that are missing or changed online. <br> Local changes to other races are kept.",
+                unsafe_allow_html=True,
+            )
+            if st.button("Sync"):
+                func.submit_fetch("sync", DATA_FOLDER)
+
+    func.show_jobs(DATA_FOLDER, ("results", "sync"))
 
     if race_name is None:
         st.stop()
 
     has_sprint = races_df["HasSprint"][race_names.index(race_name)]
-    race_file = f"{DATA_FOLDER}/races/race_{race_name}.csv"
-    sprint_file = f"{DATA_FOLDER}/races/sprint_{race_name}.csv"
-
-    if os.path.exists(race_file):
-        race_df = pd.read_csv(
-            f"{DATA_FOLDER}/races/race_{race_name}.csv",
-        )
-    else:
+    # versions of the results shown before the first change, saves check them
+    versions = st.session_state.setdefault(f"result_versions_{DATA_FOLDER}", {})
+    editor_keys = (f"race_editor_{race_name}_{DATA_FOLDER}", f"sprint_{race_name}")
+    for session in ("race", "sprint"):
+        if f"{session}_{race_name}" not in versions or all(
+            func.unedited(key) for key in editor_keys
+        ):
+            versions[f"{session}_{race_name}"] = season_store.version(
+                f"{session}_{race_name}"
+            )
+    race_df = func.cached_result(DATA_FOLDER, race_name, "race")
+    if race_df is None:
         race_df = data.RACE_DEFAULT
-    if os.path.exists(sprint_file):
-        sprint_df = pd.read_csv(sprint_file)
-    else:
+    sprint_df = func.cached_result(DATA_FOLDER, race_name, "sprint")
+    if sprint_df is None:
         sprint_df = data.SPRINT_DEFAULT
 
     st.header(f"Results for {race_name}")
@@ -100,7 +106,7 @@ def main(data_folder, selected_season):
             ),
         },
         hide_index=True,
-        key=f"race_editor_{race_name}_{DATA_FOLDER}",
+        key=editor_keys[0],
         use_container_width=True,
     )
 
@@ -129,7 +135,7 @@ def main(data_folder, selected_season):
                 ),
             },
             hide_index=True,
-            key=f"sprint_{race_name}",
+            key=editor_keys[1],
             use_container_width=True,
         )
 
@@ -152,10 +158,29 @@ def main(data_folder, selected_season):
         #     )
         # update the team names
         race_df_edit = data.update_teams(race_df_edit, drivers_df)
-        race_df_edit.to_csv(race_file, index=False)
+        tables = {"race": race_df_edit}
         if has_sprint:
-            sprint_df_edit = data.update_teams(sprint_df_edit, drivers_df)
-            sprint_df_edit.to_csv(sprint_file, index=False)
+            tables["sprint"] = data.update_teams(sprint_df_edit, drivers_df)
+        try:
+            for session, table in tables.items():
+                versions[f"{session}_{race_name}"] = season_store.write_result(
+                    race_name,
+                    session,
+                    table,
+                    expected=versions[f"{session}_{race_name}"],
+                )
+        except store.WriteConflict as error:
+
+            def reload():
+                for session in ("race", "sprint"):
+                    versions.pop(f"{session}_{race_name}", None)
+                for key in editor_keys:
+                    st.session_state.pop(key, None)
+
+            func.show_conflict(error, reload)
+            st.stop()
+        # the dashboard totals from this race on
+        standings.update(DATA_FOLDER, race_name)
         # update fastest df
         # fastest_df.to_csv(fastest_file, index=True)
         st.rerun()
@@ -1,8 +1,6 @@
-import os
-
 import pandas as pd
 import streamlit as st
-from utils import data, style
+from utils import func, store, style
 
 
 def main(data_folder, selected_season):
@@ -10,22 +8,33 @@ def main(data_folder, selected_season):
     st.title(f"Team Data Configuration - {selected_season}")
 
     teams_data_editor_nr = st.session_state.setdefault("teams_data_editor_nr", 0)
-    if f"teams_df_{DATA_FOLDER}" not in st.session_state:
-        if os.path.exists(DATA_FOLDER + "/teams.csv"):
-            st.session_state[f"teams_df_{DATA_FOLDER}"] = pd.read_csv(
-                DATA_FOLDER + "/teams.csv", dtype={"TeamName": str, "Color": str}
+    version_key = f"teams_version_{DATA_FOLDER}"
+    editor_key = f"teams_editor_{DATA_FOLDER}_{teams_data_editor_nr}"
+    # the session only has a frame of its own after loading a fetched one,
+    # otherwise the table is a view of the one shared by all sessions
+    teams_df = st.session_state.get(f"teams_df_{DATA_FOLDER}")
+    if teams_df is None:
+        if func.unedited(editor_key):
+            # nothing to lose yet, follow the saves of others. taken first, a
+            # save between the two reads shows up as a conflict
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).version(
+                "teams"
             )
-        else:
-            st.session_state[f"teams_df_{DATA_FOLDER}"] = pd.DataFrame(
+        try:
+            teams_df = func.cached_table(
+                DATA_FOLDER, "teams", dtype={"TeamName": str, "Color": str}
+            )
+        except FileNotFoundError:
+            teams_df = pd.DataFrame(
                 columns=["TeamName", "Color"],
             )
 
     st.header("Edit Teams")
     teams_df = st.data_editor(
-        st.session_state[f"teams_df_{DATA_FOLDER}"],
+        teams_df,
         num_rows="dynamic",
         use_container_width=True,
-        key=f"teams_editor_{DATA_FOLDER}_{teams_data_editor_nr}",
+        key=editor_key,
         disabled=False,
     )
 
@@ -35,17 +44,29 @@ def main(data_folder, selected_season):
     with col2:
         fetch_button = st.button("Fetch Teams from API")
 
+    def reload():
+        st.session_state.pop(f"teams_df_{DATA_FOLDER}", None)
+        st.session_state.teams_data_editor_nr += 1
+
     if save_button:
-        teams_df.to_csv(DATA_FOLDER + "/teams.csv", index=False)
-        st.session_state[f"teams_df_{DATA_FOLDER}"] = teams_df
-        st.success("Data saved.")
-    if fetch_button:
-        with st.spinner("Fetching data..."):
-            st.session_state[f"teams_df_{DATA_FOLDER}"] = data.get_teams(
-                year_to_fetch=st.session_state.year_to_fetch
+        try:
+            st.session_state[version_key] = store.get_store(DATA_FOLDER).write_table(
+                "teams", teams_df, expected=st.session_state.get(version_key)
             )
-            st.session_state.teams_data_editor_nr += 1
-        st.rerun()
+        except store.WriteConflict as error:
+            func.show_conflict(error, reload)
+        else:
+            # a fresh editor on the saved table
+            reload()
+            st.success("Data saved.")
+    if fetch_button:
+        func.submit_fetch("teams", DATA_FOLDER)
+
+    def load_fetched(teams_df):
+        st.session_state[f"teams_df_{DATA_FOLDER}"] = teams_df
+        st.session_state.teams_data_editor_nr += 1
+
+    func.show_jobs(DATA_FOLDER, ("teams",), on_result=load_fetched)
 
 
 if __name__ == "__main__":
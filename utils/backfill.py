@@ -0,0 +1,194 @@
+"""headless archive backfill
+
+python -m utils.backfill 1950 2024 [--workers 4] [--race-workers 4] [--data-folder ./data]
+                                   [--storage csv|parquet]
+
+every season runs in its own worker process and is written to
+<data-folder>/<year> through utils/store.py, the teams, drivers, races and
+results tables just like the fetch buttons in the Config tabs. progress is kept in
+<data-folder>/<year>/.backfill.json after every stage and every race, an
+interrupted run started again with the same arguments continues there. races
+still to come are fetched again by the next run, a season is only finished
+once all its races have results or its year is over.
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+from utils import data, store
+
+CHECKPOINT_FILE = ".backfill.json"
+
+
+def load_checkpoint(folder):
+    try:
+        with open(os.path.join(folder, CHECKPOINT_FILE)) as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {"stages": [], "races": {}, "done": False}
+
+
+def save_checkpoint(folder, checkpoint):
+    path = os.path.join(folder, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w") as file:
+        json.dump(checkpoint, file, default=str)
+    os.replace(path + ".tmp", path)
+
+
+def race_complete(race):
+    """whether a checkpointed race needs no more fetching: it has a result or
+    it was already over without one when it was fetched"""
+    return race["has_result"] or (
+        "fetched" in race
+        and pd.Timestamp(race["end_date"]) < pd.Timestamp(race["fetched"])
+    )
+
+
+def backfill_season(
+    year, data_folder=data.DATA_FOLDER, race_workers=data.FETCH_WORKERS, storage=None
+):
+    """fetch teams, drivers, calendar and results of one season, resuming a checkpoint
+
+    new seasons are stored as `storage` (see utils/store.py), default store.BACKEND
+    """
+    if storage is not None:
+        store.configure(storage)
+    year = str(year)
+    folder = os.path.join(data_folder, year)
+    os.makedirs(folder, exist_ok=True)
+    season_store = store.get_store(folder)
+    checkpoint = load_checkpoint(folder)
+    if checkpoint["done"]:
+        return {"year": year, "status": "skipped"}
+
+    # drivers come after teams and before the results, which look up their teams
+    for stage, fetch_table, columns in [
+        ("teams", data.get_teams, ["TeamName", "Color"]),
+        ("drivers", data.get_drivers, ["DriverName", "TeamName"]),
+    ]:
+        if stage not in checkpoint["stages"]:
+            table = fetch_table(year_to_fetch=year).reindex(columns=columns)
+            season_store.write_table(stage, table)
+            checkpoint["stages"].append(stage)
+            save_checkpoint(folder, checkpoint)
+
+    # one download per race page gives both the calendar entry and the results
+    locations = data.get_race_links(year)
+    drivers_df = season_store.read_table("drivers")
+    lock = threading.Lock()
+
+    def fetch(location, link):
+        info = data.fetch_race(link, with_results=True)
+        has_result = data.save_race_results(folder, location, info, drivers_df)
+        with lock:
+            checkpoint["races"][location] = {
+                key: info[key]
+                for key in ["start_date", "end_date", "city", "circuit", "has_sprint"]
+            } | {"has_result": has_result, "fetched": datetime.now()}
+            save_checkpoint(folder, checkpoint)
+
+    todo = [
+        (location, link)
+        for location, link in locations
+        if location not in checkpoint["races"]
+        or not race_complete(checkpoint["races"][location])
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, race_workers)) as executor:
+        for future in as_completed([executor.submit(fetch, *race) for race in todo]):
+            future.result()
+
+    infos = {
+        location: checkpoint["races"][location]
+        | {
+            "start_date": pd.Timestamp(checkpoint["races"][location]["start_date"]),
+            "end_date": pd.Timestamp(checkpoint["races"][location]["end_date"]),
+        }
+        for location, _ in locations
+    }
+    season_store.write_table("races", data.races_to_df(infos))
+    checkpoint["done"] = int(year) < datetime.now().year or all(
+        info["has_result"] for info in infos.values()
+    )
+    save_checkpoint(folder, checkpoint)
+    return {
+        "year": year,
+        "status": "done" if checkpoint["done"] else "partial",
+        "races": len(infos),
+        "fetched": len(todo),
+    }
+
+
+def backfill(
+    years,
+    data_folder=data.DATA_FOLDER,
+    workers=4,
+    race_workers=data.FETCH_WORKERS,
+    storage=None,
+):
+    """backfill many seasons in parallel processes, yields one summary per season"""
+    with ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(
+                backfill_season, year, data_folder, race_workers, storage
+            ): year
+            for year in years
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as error:  # keep going, the checkpoint has the progress
+                yield {
+                    "year": str(futures[future]),
+                    "status": "failed",
+                    "error": repr(error),
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill archive seasons into the data folder."
+    )
+    parser.add_argument("first_year", type=int)
+    parser.add_argument("last_year", type=int)
+    parser.add_argument(
+        "--workers", type=int, default=4, help="seasons fetched in parallel"
+    )
+    parser.add_argument(
+        "--race-workers",
+        type=int,
+        default=data.FETCH_WORKERS,
+        help="race pages fetched in parallel per season",
+    )
+    parser.add_argument("--data-folder", default=data.DATA_FOLDER)
+    parser.add_argument(
+        "--storage",
+        choices=list(store.BACKENDS),
+        default=store.BACKEND,
+        help="layout of new seasons",
+    )
+    args = parser.parse_args()
+
+    years = range(args.first_year, args.last_year + 1)
+    failed = []
+    for summary in backfill(
+        years, args.data_folder, args.workers, args.race_workers, args.storage
+    ):
+        print(
+            ", ".join(f"{key}: {value}" for key, value in summary.items()), flush=True
+        )
+        if summary["status"] == "failed":
+            failed.append(summary["year"])
+    if failed:
+        raise SystemExit(
+            f"failed seasons (run again to resume): {' '.join(sorted(failed))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+import contextvars
+import functools
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# memory the shared season data may take, see configure
+SEASON_CACHE_MB = 256
+
+
+def ttl_cache(ttl):
+    """process-wide memo for slow lookups that change rarely
+
+    the first call for a set of arguments blocks, after that the stored value
+    is returned right away. once it is older than `ttl` seconds, the stale
+    value is still returned while a background thread refreshes it, a failed
+    refresh keeps the old value. returned values are shared, do not mutate.
+    """
+
+    def decorator(func):
+        entries = {}  # key -> (value, time stored)
+        refreshing = set()
+        lock = threading.Lock()
+
+        def store(key, args, kwargs):
+            value = func(*args, **kwargs)
+            with lock:
+                entries[key] = (value, time.monotonic())
+            return value
+
+        def refresh(key, args, kwargs):
+            try:
+                store(key, args, kwargs)
+            except Exception:  # stale beats nothing, try again on the next call
+                pass
+            finally:
+                with lock:
+                    refreshing.discard(key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (args, tuple(sorted(kwargs.items())))
+            with lock:
+                entry = entries.get(key)
+                if entry is not None:
+                    value, stored = entry
+                    if time.monotonic() - stored > ttl and key not in refreshing:
+                        refreshing.add(key)
+                        # in the context of the caller, e.g. its offline mode
+                        threading.Thread(
+                            target=contextvars.copy_context().run,
+                            args=(refresh, key, args, kwargs),
+                            daemon=True,
+                        ).start()
+                    return value
+            return store(key, args, kwargs)
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+def _size(value):
+    """bytes a cached value takes, roughly"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_size(item) for item in value)
+    if hasattr(value, "__dict__"):
+        return sum(_size(item) for item in vars(value).values())
+    return sys.getsizeof(value)
+
+
+def _freeze(value):
+    """make the arrays in value read-only, frames are kept safe by _view"""
+    if isinstance(value, np.ndarray):
+        value.setflags(write=False)
+    elif isinstance(value, (tuple, list)):
+        for item in value:
+            _freeze(item)
+    elif hasattr(value, "__dict__") and not isinstance(value, type):
+        for item in vars(value).values():
+            _freeze(item)
+
+
+def _view(value):
+    """what a caller gets of a cached value, frames as shallow copies: pandas
+    copies their data on the first change, the cached frame stays as it is"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=False)
+    if isinstance(value, tuple):
+        return tuple(_view(item) for item in value)
+    if isinstance(value, list):
+        return [_view(item) for item in value]
+    return value
+
+
+class SeasonCache:
+    """season data shared by all sessions of the process
+
+    get(key, version, load) returns the value stored under key if it was
+    stored for the same version (e.g. store.fingerprint of the season),
+    otherwise load() is called and its value stored. values are held once,
+    read-only: numpy arrays are locked and frames are handed out as views,
+    so a session only copies what it changes. the least recently used values
+    are dropped once all take more than budget bytes, a value bigger than
+    the budget is returned but not kept
+    """
+
+    def __init__(self, budget=SEASON_CACHE_MB * 2**20):
+        self.budget = budget
+        self.entries = OrderedDict()  # key -> (version, value, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def _drop(self, key):
+        self.size -= self.entries.pop(key)[2]
+
+    def _evict(self):
+        while self.size > self.budget and self.entries:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def get(self, key, version, load):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return _view(entry[1])
+            self.misses += 1
+        # loaded outside the lock, other seasons are served meanwhile
+        value = load()
+        _freeze(value)
+        size = _size(value)
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            if size <= self.budget:
+                self.entries[key] = (version, value, size)
+                self.size += size
+                self._evict()
+        return _view(value)
+
+    def resize(self, budget):
+        with self.lock:
+            self.budget = budget
+            self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def stats(self):
+        """hits, misses, evictions, entries, size and budget in bytes"""
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size": self.size,
+                "budget": self.budget,
+            }
+
+
+_season_cache = None
+_season_cache_lock = threading.Lock()
+
+
+def get_season_cache():
+    """the season cache shared by all sessions of this process"""
+    global _season_cache
+    with _season_cache_lock:
+        if _season_cache is None:
+            _season_cache = SeasonCache()
+        return _season_cache
+
+
+def configure(budget_mb):
+    """memory budget of the season cache in MB"""
+    global SEASON_CACHE_MB
+    SEASON_CACHE_MB = budget_mb
+    get_season_cache().resize(budget_mb * 2**20)
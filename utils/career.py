@@ -0,0 +1,158 @@
+"""career numbers of drivers and teams across the seasons of a data folder
+
+every season is summed up once from its standings (see standings): per
+driver, team and session the points, starts, wins and podiums of the whole
+season. summaries are only loaded for the seasons a query asks for, several
+at a time, and kept in the season cache (see cache.SeasonCache) under the
+season fingerprint, so a season that changed is summed up again and the
+others are left alone. a summary is a few hundred rows at most, the career
+tables are grouped from the summaries of the asked seasons:
+
+summary         Season, DriverName, TeamName, Sprint, Points, Starts, Wins,
+                Podiums of every season
+driver_careers  all-time numbers per driver
+team_careers    all-time numbers per team
+team_history    numbers, drivers and championship position of every team
+                per season
+
+wins, podiums and starts only count races, points count sprints too
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils import cache, standings, store
+
+SUMMARY_COLUMNS = [
+    "Season",
+    "DriverName",
+    "TeamName",
+    "Sprint",
+    "Points",
+    "Starts",
+    "Wins",
+    "Podiums",
+]
+TOTALS = ["Points", "Starts", "Wins", "Podiums"]
+# seasons summed up in parallel by summary
+LOAD_WORKERS = 8
+
+
+def seasons(data_folder):
+    """names of the seasons in the data folder, oldest first"""
+    return store.list_seasons(data_folder)
+
+
+def _count(final, positions, wanted):
+    """how often the pairs finished in one of the wanted positions"""
+    first = len(standings.FIELDS)
+    columns = [first + positions.index(p) for p in wanted if p in positions]
+    return final[:, columns].sum(axis=1)
+
+
+def _summarize(folder, season):
+    try:
+        season_standings = standings.load(folder)
+    except FileNotFoundError:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    if not len(season_standings.races):
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    final = season_standings.totals[-1]
+    positions = season_standings.positions
+    race = ~season_standings.pairs["Sprint"].to_numpy()
+    summary = season_standings.pairs.assign(
+        Season=season,
+        Points=final[:, 0],
+        Starts=np.where(race, final[:, 1], 0),
+        Wins=np.where(race, _count(final, positions, [1]), 0),
+        Podiums=np.where(race, _count(final, positions, [1, 2, 3]), 0),
+    )
+    # rows without a driver or team still count for the other one
+    summary = summary.dropna(subset=["DriverName", "TeamName"], how="all")
+    summary[TOTALS[1:]] = summary[TOTALS[1:]].astype(int)
+    return summary[SUMMARY_COLUMNS].reset_index(drop=True)
+
+
+def season_summary(data_folder, season):
+    """summary of one season, from the cache while the season is unchanged"""
+    folder = os.path.join(data_folder, season)
+    return cache.get_season_cache().get(
+        (folder, "career"),
+        store.fingerprint(folder),
+        lambda: _summarize(folder, season),
+    )
+
+
+def summary(data_folder, selected=None, workers=LOAD_WORKERS):
+    """summaries of the selected seasons (all by default) in one table"""
+    if selected is None:
+        selected = seasons(data_folder)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        frames = list(
+            executor.map(lambda season: season_summary(data_folder, season), selected)
+        )
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _careers(summary, entity):
+    grouped = summary.groupby(entity, sort=False)
+    careers = grouped[TOTALS].sum()
+    careers["Seasons"] = grouped["Season"].nunique()
+    careers["First"] = grouped["Season"].min()
+    careers["Last"] = grouped["Season"].max()
+    return careers.sort_values(
+        ["Points", "Wins"], ascending=False, kind="stable"
+    ).reset_index()
+
+
+def driver_careers(summary):
+    """per driver the summed up numbers, seasons, first and last season and
+    the teams driven for, most points first"""
+    careers = _careers(summary, "DriverName")
+    teams = (
+        summary.dropna(subset=["TeamName"])
+        .groupby("DriverName")["TeamName"]
+        .unique()
+        .map(", ".join)
+    )
+    careers["Teams"] = careers["DriverName"].map(teams)
+    return careers
+
+
+def team_careers(summary):
+    """per team the summed up numbers, seasons, first and last season and
+    championships won, most points first"""
+    careers = _careers(summary, "TeamName")
+    history = team_history(summary)
+    titles = history[history["Position"] == 1]["TeamName"].value_counts()
+    careers["Titles"] = careers["TeamName"].map(titles).fillna(0).astype(int)
+    return careers
+
+
+def team_history(summary):
+    """per season and team the numbers, the drivers (most points first) and
+    the position in the championship"""
+    by_driver = (
+        summary.groupby(["Season", "TeamName", "DriverName"])["Points"]
+        .sum()
+        .reset_index()
+        .sort_values(["Season", "TeamName", "Points"], ascending=[True, True, False])
+    )
+    history = summary.groupby(["Season", "TeamName"])[TOTALS].sum()
+    history["Drivers"] = by_driver.groupby(["Season", "TeamName"])["DriverName"].agg(
+        ", ".join
+    )
+    history["Position"] = (
+        history.groupby(level="Season")["Points"]
+        .rank(method="min", ascending=False)
+        .astype(int)
+    )
+    return history.reset_index().sort_values(
+        ["Season", "Position"], kind="stable", ignore_index=True
+    )
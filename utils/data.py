@@ -1,19 +1,65 @@
 # %%
-import math
+import argparse
+import contextvars
 import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
 from datetime import datetime
+from functools import partial
 from io import StringIO
 
+import numpy as np
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup, FeatureNotFound
 
-# URL for the F1 results page
-base_url = "https://www.formula1.com"
-archive_url = "https://www.formula1.com/en/results/"
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+from utils import cache, fetch, page_json, store
+
+# URL for the F1 results page, F1_BASE_URL points the scrapers at a stand-in
+base_url = os.environ.get("F1_BASE_URL", "https://www.formula1.com").rstrip("/")
+archive_url = base_url + "/en/results/"
 
 DATA_FOLDER = "./data"
 
+# number of race pages downloaded in parallel, 1 fetches them one by one
+FETCH_WORKERS = 8
+
+# seconds the archive year list and season race lists are kept in memory
+# before they are refreshed in the background
+ARCHIVE_TTL = 15 * 60
+
+# fast parsing: lxml parses the page and only the tags the scrapers look at
+# (result tables, a.block/a.group links, date/circuit <p>) end up in the soup
+FAST_PARSE = True
+FAST_PARSE_XPATH = (
+    "//table"
+    " | //a[contains(concat(' ', normalize-space(@class), ' '), ' block ')"
+    " or contains(concat(' ', normalize-space(@class), ' '), ' group ')]"
+    " | //p"
+)
+
+# read race info and result tables from the json embedded in the pages,
+# pages without usable json fall back to the dom scrapers
+EXTRACT_JSON = True
+SPRINT_LINK_RE = re.compile(r'<a[^>]*href="([^"]*sprint-results[^"]*)"')
+
+# per-stage scraping counters: index_pages, race_pages, sprint_pages,
+# tables_parsed, results_saved, json_pages, dom_pages and parse_seconds
+STATS = Counter()
+# url -> "json" or "dom", whichever path the page was read with
+PARSE_REPORT = {}
+# season folder -> seconds its last load_season took
+LOAD_TIMES = {}
+_stats_lock = threading.Lock()
+
 COL_NAME_MAP = {
     "Pos": "Position",
     "No": "Number",
@@ -67,108 +113,314 @@ SPRINT_DEFAULT = pd.DataFrame(
 )
 
 
+def set_base_url(url):
+    """scrape another host, e.g. a local server with recorded pages"""
+    global base_url, archive_url
+    base_url = url.rstrip("/")
+    archive_url = base_url + "/en/results/"
+    get_race_links.cache_clear()
+    get_available_years.cache_clear()
+
+
+@contextmanager
+def timed(stage):
+    """add the time spent in the block to the counter <stage>_seconds"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        count(f"{stage}_seconds", time.perf_counter() - start)
+
+
+def count(stage, n=1):
+    """add to the counter of a scraping stage"""
+    with _stats_lock:
+        STATS[stage] += n
+
+
+def get_stats():
+    """pages downloaded/tables parsed/results saved per stage since the last reset"""
+    with _stats_lock:
+        return dict(STATS)
+
+
+def reset_stats():
+    with _stats_lock:
+        STATS.clear()
+        PARSE_REPORT.clear()
+
+
+def report_parse(url, path):
+    with _stats_lock:
+        STATS[f"{path}_pages"] += 1
+        PARSE_REPORT[url] = path
+
+
+def get_parse_report():
+    """url -> "json" | "dom" for every page read since the last reset"""
+    with _stats_lock:
+        return dict(PARSE_REPORT)
+
+
 def update_teams(df, drivers_df):
-    """update column TeamName in df based on the column DriverName-TeamName pair in drivers_df"""
-    for i, row in df.iterrows():
-        driver = row["DriverName"]
-        team = row["TeamName"]
-        if driver is not None and isinstance(driver, str):
-
-            driver_row = drivers_df[drivers_df["DriverName"] == driver]
-            if len(driver_row) < 1:
-                continue
-            if team is None or (isinstance(team, float) and math.isnan(team)):
-                team = driver_row["TeamName"].values[0]
-                df.loc[i, "TeamName"] = team
+    """update column TeamName in df based on the column DriverName-TeamName pair in drivers_df
+
+    only missing team names are filled in, the first team of a driver counts
+    """
+    teams = drivers_df.drop_duplicates("DriverName").set_index("DriverName")["TeamName"]
+    teams = teams[teams.index.notna()]
+    df["TeamName"] = df["TeamName"].fillna(df["DriverName"].map(teams))
     return df
 
 
-def get_soup(url):
-    content = requests.get(url).content.decode("utf-8")
-    content = content.replace("\xa0", " ")
-    soup = BeautifulSoup(content, "html.parser")
+def make_soup(content):
+    with timed("parse"):
+        if not FAST_PARSE or lxml_html is None or not content.strip():
+            return BeautifulSoup(content, "html.parser")
+        # xpath returns document order, tags inside an already kept tag are part of it
+        kept = set()
+        parts = []
+        for element in lxml_html.fromstring(content).xpath(FAST_PARSE_XPATH):
+            if any(ancestor in kept for ancestor in element.iterancestors()):
+                continue
+            kept.add(element)
+            parts.append(
+                lxml_html.tostring(element, encoding="unicode", with_tail=False)
+            )
+        return BeautifulSoup("".join(parts), "lxml")
+
+
+def get_soup(url, revalidate=False):
+    content = fetch.get_page(url, revalidate)
+    soup = make_soup(content)
     return soup
 
 
-def get_table(soup):
-    table = soup.find(lambda tag: tag.name == "table")
+def _cell_text(cell):
+    # same whitespace handling as pd.read_html
+    return " ".join(cell.get_text().split()) or None
+
+
+def _infer_column(column):
     try:
-        table = pd.read_html(StringIO(str(table)))[0]
-    except FeatureNotFound:
-        return None
-    except ValueError:  # no tables found
+        return pd.to_numeric(column)
+    except (ValueError, TypeError):
+        return column
+
+
+def read_table(table):
+    """read a <table> tag straight into a DataFrame, no str()/read_html round trip"""
+    rows = table.find_all("tr")
+    if not rows:
         return None
-    return table
+    header = [_cell_text(cell) for cell in rows[0].find_all(["th", "td"])]
+    body = [[_cell_text(cell) for cell in row.find_all(["td", "th"])] for row in rows[1:]]
+    body = [row for row in body if len(row) == len(header)]
+    df = pd.DataFrame(body, columns=header)
+    if df.empty:
+        return df
+    return df.apply(_infer_column)
 
 
-def get_sprint(soup, only_check=False):
+def get_table(soup):
+    count("tables_parsed")
+    with timed("parse"):
+        table = soup.find(lambda tag: tag.name == "table")
+        if table is None:
+            return None
+        if FAST_PARSE:
+            return read_table(table)
+        try:
+            table = pd.read_html(StringIO(str(table)))[0]
+        except FeatureNotFound:
+            return None
+        except ValueError:  # no tables found
+            return None
+        return table
+
+
+def get_sprint_link(soup):
+    """link of the sprint results page referenced by a race page, or None"""
     links = soup.find_all("a", href=True, class_="block")
     links = [link for link in links if "sprint-results" in link["href"]]
-    if only_check:
-        return len(links) > 0
     if len(links) > 0:
-        link = links[0]
-        sprint_link = base_url + link["href"]
-        soup = get_soup(sprint_link)
+        return links[0]["href"]
+    return None
+
+
+def get_sprint(soup, only_check=False):
+    sprint_link = get_sprint_link(soup)
+    if only_check:
+        return sprint_link is not None
+    if sprint_link is not None:
+        soup = get_soup(base_url + sprint_link)
+        count("sprint_pages")
         return get_table(soup)
     return None
 
 
-def get_locations(year_to_fetch="Current"):
+def parse_race_page(soup, link):
+    """extract date, city and circuit from a race result page"""
+    # parse date format: dd MMM - dd MMM YYYY
+    date, circuit = soup.find_all("p")[3:5]
+    date = date.get_text(strip=True)
+    circuit = circuit.get_text(strip=True)
+    circuit, city = circuit.split(", ")
+    split = date.split(" - ")
+    if len(split) == 1:
+        start_date = datetime.strptime(date, "%d %b %Y")
+        end_date = start_date + pd.DateOffset(days=3)
+    else:
+        start, end = date.split(" - ")
+        end_date = datetime.strptime(end, "%d %b %Y")
+        if len(start.split()) == 1:
+            start = f"{start} {end.split()[-2]} {end.split()[-1]}"
+        elif len(start.split()) == 2:
+            start = f"{start} {end.split()[-1]}"
+        start_date = datetime.strptime(start, "%d %b %Y")
+
+    return {
+        "link": link,
+        "start_date": start_date,
+        "end_date": end_date,
+        "city": city,
+        "circuit": circuit,
+    }
+
+
+def read_json(url, content, finder):
+    """run a page_json finder on a page, None (dom path) if nothing usable is found"""
+    if EXTRACT_JSON:
+        with timed("parse"):
+            found = finder(page_json.extract(content))
+        if found is not None:
+            report_parse(url, "json")
+            return found
+    report_parse(url, "dom")
+    return None
+
+
+def read_result_page(url, content):
+    """result table of a race or sprint page"""
+    table = read_json(url, content, page_json.find_results)
+    if table is None:
+        table = get_table(make_soup(content))
+    return table
+
+
+def read_race_page(url, content, link, with_results=False):
+    """race info, race table (with results only) and sprint link of a race page"""
+    if EXTRACT_JSON:
+        with timed("parse"):
+            payloads = page_json.extract(content)
+            info = page_json.find_race_info(payloads)
+            race = page_json.find_results(payloads) if with_results else None
+        if info is not None and (race is not None or not with_results):
+            report_parse(url, "json")
+            info["link"] = link
+            sprint_link = SPRINT_LINK_RE.search(content)
+            return info, race, sprint_link and sprint_link.group(1)
+
+    report_parse(url, "dom")
+    soup = make_soup(content)
+    race = get_table(soup) if with_results else None
+    return parse_race_page(soup, link), race, get_sprint_link(soup)
+
+
+def fetch_race(link, with_results=False, revalidate=False):
+    """download a race page once and extract everything needed from it
+
+    without results only the calendar info is parsed and the sprint page is
+    not downloaded, with results the race and sprint tables are added as
+    info["race"] and info["sprint"]
+    """
+    start = time.perf_counter()
+    url = base_url + link
+    content = fetch.get_page(url, revalidate)
+    count("race_pages")
+    info, race, sprint_link = read_race_page(url, content, link, with_results)
+    if not with_results:
+        info["has_sprint"] = sprint_link is not None
+        return info
+
+    info["race"] = race
+    info["sprint"] = None
+    if sprint_link is not None:
+        sprint_url = base_url + sprint_link
+        info["sprint"] = read_result_page(
+            sprint_url, fetch.get_page(sprint_url, revalidate)
+        )
+        count("sprint_pages")
+    info["has_sprint"] = info["sprint"] is not None
+    info["seconds"] = time.perf_counter() - start
+    return info
+
+
+def fetch_ordered(func, *iterables, workers=FETCH_WORKERS):
+    """map func over the inputs in `workers` threads, yielding in input order
+
+    (not in the order the pages finish). at most 2 * workers calls are in
+    flight or waiting to be consumed, so a slow consumer does not pile up
+    fetched pages. pending calls are dropped when the consumer stops early,
+    e.g. on an error or a cancelled job
+    """
+    workers = max(1, workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = deque()
+    try:
+        for args in zip(*iterables):
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+            # the offline mode of the caller holds in the workers too
+            pending.append(executor.submit(contextvars.copy_context().run, func, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+@cache.ttl_cache(ARCHIVE_TTL)
+def get_race_links(year_to_fetch="Current"):
+    """(location, link) of every race in the season archive"""
     if year_to_fetch == "Current":
         year_to_fetch = str(datetime.now().year)
         # new feature: from https://www.formula1.com/en/racing/2025
     url = archive_url + year_to_fetch + "/races"
     # get all location names and location links from the main page
     soup = get_soup(url)
+    count("index_pages")
     # get all links that contain race-result
     links = soup.find_all("a", href=True, class_="block")
     # get all location names
-    locations = [
+    return [
         (link.get_text(strip=True), link["href"])
         for link in links
         if "race-result" in link["href"]
     ]
-    infos = dict()
-
-    for location, link in locations:
-        soup = get_soup(base_url + link)
-
-        # parse date format: dd MMM - dd MMM YYYY
-        date, circuit = soup.find_all("p")[3:5]
-        date = date.get_text(strip=True)
-        circuit = circuit.get_text(strip=True)
-        circuit, city = circuit.split(", ")
-        split = date.split(" - ")
-        if len(split) == 1:
-            start_date = datetime.strptime(date, "%d %b %Y")
-            end_date = start_date + pd.DateOffset(days=3)
-        else:
-            start, end = date.split(" - ")
-            end_date = datetime.strptime(end, "%d %b %Y")
-            if len(start.split()) == 1:
-                start = f"{start} {end.split()[-2]} {end.split()[-1]}"
-            elif len(start.split()) == 2:
-                start = f"{start} {end.split()[-1]}"
-            start_date = datetime.strptime(start, "%d %b %Y")
-        has_sprint = get_sprint(soup) is not None
-
-        infos[location] = {
-            "link": link,
-            "start_date": start_date,
-            "end_date": end_date,
-            "city": city,
-            "circuit": circuit,
-            "has_sprint": has_sprint,
-        }
+
+
+def get_locations(year_to_fetch="Current", workers=FETCH_WORKERS, with_results=False):
+    """fetch all race pages of a season, `workers` of them at a time"""
+    locations = get_race_links(year_to_fetch)
+
+    pages = fetch_ordered(
+        partial(fetch_race, with_results=with_results),
+        [link for _, link in locations],
+        workers=workers,
+    )
+    infos = dict(zip([location for location, _ in locations], pages))
 
     return infos
 
 
-def get_races(year_to_fetch="Current"):
+def get_races(year_to_fetch="Current", workers=FETCH_WORKERS):
     """Index,Date,City,Country,HasSprint"""
-    info = get_locations(year_to_fetch=year_to_fetch)
+    info = get_locations(year_to_fetch=year_to_fetch, workers=workers)
+    return races_to_df(info)
+
 
+def races_to_df(info):
+    """races.csv table from {location: info} as returned by get_locations"""
     data = []
     for location, link in info.items():
         data.append(
@@ -185,8 +437,10 @@ def get_races(year_to_fetch="Current"):
     return pd.DataFrame(data)
 
 
-def refactor_df(df: pd.DataFrame, datafolder=DATA_FOLDER):
+def refactor_df(df: pd.DataFrame, datafolder=DATA_FOLDER, drivers_df=None):
     """assuming df is a race/sprint result table from f1 web: refactor names,columns,types,..."""
+    # names read from the page json come without the driver abbreviation
+    from_json = df.attrs.get("source") == "json"
     df = df.iloc[:20, :]
     df = df[["Pos", "Driver", "Pts"]]
 
@@ -194,53 +448,376 @@ def refactor_df(df: pd.DataFrame, datafolder=DATA_FOLDER):
     df = df[df["Pos"].apply(lambda x: isinstance(x, int) or x.isnumeric())]
 
     df["Pos"] = df["Pos"].astype(int)
-    df["Driver"] = df["Driver"].str[:-3]
+    if not from_json:
+        df["Driver"] = df["Driver"].str[:-3]
     df["Pts"] = pd.to_numeric(df["Pts"])
 
     df = df.rename(columns=COL_NAME_MAP)
     df.insert(2, "TeamName", None)
-    drivers_df = pd.read_csv(datafolder + "/drivers.csv")
+    if drivers_df is None:
+        drivers_df = store.get_store(datafolder).read_table("drivers")
     df = update_teams(df, drivers_df)
 
     return df
 
 
-def save_results_to_csv(datafolder=DATA_FOLDER, year_to_fetch="Current"):
-    os.makedirs(datafolder + "/races", exist_ok=True)
-    for file in os.listdir(datafolder + "/races"):
-        if file.endswith(".csv"):
-            os.remove(datafolder + "/races/" + file)
-    for location, info in get_locations(year_to_fetch).items():
-        link = info["link"]
-        soup = get_soup(base_url + link)
-
-        # Get the race results
-        race = get_table(soup)
-        if race is None:
-            continue
-        race = refactor_df(race, datafolder)
-        # add fastest lap column
-        race["FastestLap"] = race["Points"].map(
-            lambda pt: pt not in ([0] + RACE_POINTS)
+def result_tables(info, datafolder, drivers_df):
+    """{"sprint": df, "race": df} results tables of a fetched race, in weekend order
+
+    empty if the race has no result yet, "sprint" only if it had one
+    """
+    tables = {}
+    race = info["race"]
+    if race is None:
+        return tables
+    if info["sprint"] is not None:
+        tables["sprint"] = refactor_df(info["sprint"], datafolder, drivers_df)
+    race = refactor_df(race, datafolder, drivers_df)
+    # add fastest lap column
+    race["FastestLap"] = race["Points"].map(lambda pt: pt not in ([0] + RACE_POINTS))
+    race["Points"] = race["Points"] - race["FastestLap"]
+    tables["race"] = race
+    return tables
+
+
+def save_results(datafolder, results):
+    """write [(location, session, table)] results in one go, a parquet season
+    is rewritten once instead of once per result"""
+    if results:
+        store.get_store(datafolder).write_results(results)
+        count("results_saved", len(results))
+
+
+def save_race_results(datafolder, location, info, drivers_df):
+    """write race (and sprint) table of a fetched race, False if there is no result yet"""
+    tables = result_tables(info, datafolder, drivers_df)
+    save_results(
+        datafolder, [(location, session, table) for session, table in tables.items()]
+    )
+    return bool(tables)
+
+
+def get_stored_races(datafolder):
+    """Country -> (EndDate, HasSprint) of the stored races"""
+    try:
+        races_df = store.get_store(datafolder).read_table("races")
+    except FileNotFoundError:
+        return {}
+    return dict(
+        zip(
+            races_df["Country"],
+            zip(races_df["EndDate"], races_df["HasSprint"].fillna(False)),
         )
-        race["Points"] = race["Points"] - race["FastestLap"]
+    )
 
-        race.to_csv(f"{datafolder}/races/race_{location}.csv", index=False)
-        # Get the sprint results
-        sprint = get_sprint(soup)
-        if sprint is not None:
-            sprint = refactor_df(sprint, datafolder)
-            sprint.to_csv(f"{datafolder}/races/sprint_{location}.csv", index=False)
 
+def _same_result(stored, table):
+    """whether a fetched result table has the rows of the stored one, types aside"""
+    if set(stored.columns) != set(table.columns) or len(stored) != len(table):
+        return False
+    rows = [
+        df[table.columns].astype(object).where(df[table.columns].notna(), None)
+        for df in (stored, table)
+    ]
+    return rows[0].values.tolist() == rows[1].values.tolist()
+
+
+def _result_changed(datafolder, location, tables):
+    """whether fetched result tables differ from the stored ones"""
+    season_store = store.get_store(datafolder)
+    for session, table in tables.items():
+        try:
+            stored = season_store.read_result(location, session)
+        except FileNotFoundError:
+            return True
+        if not _same_result(stored, table):
+            return True
+    return False
+
+
+def sync_race(
+    datafolder, location, link, end_date=None, has_sprint=False, drivers_df=None
+):
+    """fetch a race if it is finished and missing or changed online
+
+    missing: no stored race result, or no sprint result for a weekend the
+    races table has a sprint in. changed: the page was modified after the
+    older stored result (Last-Modified) or, where the server does not say,
+    the page revalidated with a conditional GET (the cached ETag) gives other
+    tables than the stored ones
+    returns ("added" | "updated", info) or (None, None) if nothing changed
+    """
+    now = datetime.now()
+    if end_date is not None and end_date > now:
+        return None, None
+    sessions = ["race", "sprint"] if has_sprint else ["race"]
+    season_store = store.get_store(datafolder)
+    saved = [season_store.result_saved(location, session) for session in sessions]
+    modified = None
+    if None in saved:
+        status = "added"
+    else:
+        modified = fetch.last_modified(base_url + link)
+        if modified is not None and modified <= min(saved):
+            return None, None
+        status = "updated"
+
+    info = fetch_race(link, with_results=True, revalidate=status == "updated")
+    # the races table may be missing or outdated, check again with the fetched date
+    if info["end_date"] > now:
+        return None, None
+    if status == "updated" and modified is None:
+        tables = result_tables(info, datafolder, drivers_df)
+        if not _result_changed(datafolder, location, tables):
+            return None, None
+    return status, info
+
+
+def refetch_race(link):
+    return "added", fetch_race(link, with_results=True)
+
+
+def stream_results(
+    datafolder=DATA_FOLDER,
+    year_to_fetch="Current",
+    incremental=False,
+    workers=FETCH_WORKERS,
+):
+    """results of a season, yielded one session at a time as soon as they are parsed
+
+    every item is a dict with
+        location, session ("race" | "sprint"), table (result table),
+        status ("added" | "updated"), done, total (races handled so far / in
+        the season), start_date, end_date, seconds (download + parse time of
+        the race page)
+    races without a (new) result yield a single item with session and table
+    None, so consumers can still follow the progress. a sprint comes before
+    the race of its weekend, so the race item is always the last of a
+    location. nothing is written and only a few races are held at a time,
+    see fetch_ordered. incremental works as in save_results_to_csv
+    """
+    drivers_df = store.get_store(datafolder).read_table("drivers")
+    locations = get_race_links(year_to_fetch)
+
+    if incremental:
+        stored = get_stored_races(datafolder)
+        fetched = fetch_ordered(
+            partial(sync_race, datafolder, drivers_df=drivers_df),
+            [location for location, _ in locations],
+            [link for _, link in locations],
+            [stored.get(location, (None, False))[0] for location, _ in locations],
+            [stored.get(location, (None, False))[1] for location, _ in locations],
+            workers=workers,
+        )
+    else:
+        fetched = fetch_ordered(
+            refetch_race, [link for _, link in locations], workers=workers
+        )
 
-# print(save_results_to_csv("../data/2024", "2024"))
+    with closing(fetched):
+        for done, ((location, _), (status, info)) in enumerate(
+            zip(locations, fetched), start=1
+        ):
+            item = {
+                "location": location,
+                "session": None,
+                "table": None,
+                "status": None,
+                "done": done,
+                "total": len(locations),
+                "start_date": None,
+                "end_date": None,
+                "seconds": None,
+            }
+            tables = {}
+            if info is not None:
+                tables = result_tables(info, datafolder, drivers_df)
+                item.update(
+                    start_date=info["start_date"],
+                    end_date=info["end_date"],
+                    seconds=info["seconds"],
+                )
+            if not tables:
+                yield item
+            for session, table in tables.items():
+                yield dict(item, session=session, table=table, status=status)
+
+
+def save_results_to_csv(
+    datafolder=DATA_FOLDER,
+    year_to_fetch="Current",
+    incremental=False,
+    workers=FETCH_WORKERS,
+    progress=None,
+):
+    """download every race (and sprint) page of a season once and save the results
+
+    the default wipes all stored results and refetches the season. incremental
+    only fetches finished races (EndDate passed) with a stored result missing
+    or changed online (see sync_race), all other results are left alone.
+    the results are written to the season store (see utils/store.py)
+    together at the end, or when the fetch stops early with what it has.
+    progress(done, total, location, report) is called after every race, an
+    exception raised from it stops the fetch.
+    returns {"added": [...], "updated": [...]} locations
+    """
+    report = {"added": [], "updated": []}
+
+    if not incremental:
+        store.get_store(datafolder).clear_results()
+
+    pending = []
+    try:
+        with closing(
+            stream_results(datafolder, year_to_fetch, incremental, workers)
+        ) as results:
+            for item in results:
+                if item["table"] is not None:
+                    pending.append((item["location"], item["session"], item["table"]))
+                    if item["session"] == "race":
+                        report[item["status"]].append(item["location"])
+                # the sprint comes first, the race item is the last of a weekend
+                if progress is not None and item["session"] != "sprint":
+                    progress(item["done"], item["total"], item["location"], report)
+    finally:
+        save_results(datafolder, pending)
+    return report
+
+
+def load_season(datafolder=DATA_FOLDER, results=True):
+    """races, teams, drivers and results of a season as the dashboard shows them
+
+    results as season_results puts them together, in compact types, None
+    with results=False (see standings for their totals). FileNotFoundError
+    if races, drivers or teams are missing. the time taken is kept in
+    LOAD_TIMES[datafolder]
+    """
+    start = time.perf_counter()
+    season_store = store.get_store(datafolder)
+    if results:
+        season = season_store.read_season()
+    else:
+        season = {name: season_store.read_table(name) for name in store.TABLES}
+    races_df, drivers_df, teams_df = season["races"], season["drivers"], season["teams"]
+    races_df["StartDate"] = pd.to_datetime(races_df["StartDate"]).dt.date
+    races_df["EndDate"] = pd.to_datetime(races_df["EndDate"]).dt.date
+    if not results:
+        LOAD_TIMES[datafolder] = time.perf_counter() - start
+        return races_df, teams_df, drivers_df, None
+
+    results_df = season_results(races_df, season["results"])
+    results_df = compact_results(
+        results_df,
+        drivers=drivers_df["DriverName"],
+        teams=pd.concat([drivers_df["TeamName"], teams_df["TeamName"]]),
+        countries=races_df["Country"],
+    )
+
+    LOAD_TIMES[datafolder] = time.perf_counter() - start
+    return races_df, teams_df, drivers_df, results_df
+
+
+def season_results(races_df, results):
+    """result rows of the races in races_df as the dashboard counts them
+
+    results are stored result tables with Country and Session columns (see
+    store.read_results). every row gets Country, EndDate and Sprint, the
+    fastest lap point is added to Points. races without a stored result
+    count with RACE_DEFAULT and SPRINT_DEFAULT
+    """
+    # a race counts with its stored results only if the sprint is there too
+    results = results.reindex(columns=[*RACE_DEFAULT.columns, "Country", "Session"])
+    saved = set(zip(results["Country"], results["Session"]))
+    races = races_df[["Country", "HasSprint", "EndDate"]].reset_index(names="Race")
+    complete = np.array(
+        [
+            (country, "race") in saved
+            and (not has_sprint or (country, "sprint") in saved)
+            for country, has_sprint in zip(races["Country"], races["HasSprint"])
+        ],
+        dtype=bool,
+    )
+    stored = races[complete].merge(results, on="Country")
+    stored = stored[(stored["Session"] == "race") | stored["HasSprint"]].sort_values(
+        ["Race", "Session"], kind="stable"
+    )
+    sprint = stored["Session"] == "sprint"
+    stored["FastestLap"] = stored["FastestLap"].where(~sprint, 0).astype("float64")
+    stored["Sprint"] = sprint
+    # the default rows keep their own index, stored rows count per session
+    stored.index = stored.groupby(["Race", "Session"], sort=False).cumcount().values
+
+    defaults = pd.concat(
+        [
+            RACE_DEFAULT.assign(Sprint=False),
+            SPRINT_DEFAULT.assign(FastestLap=0, Sprint=True),
+        ]
+    )
+    missing = races[~complete]
+    frames = [stored.drop(columns=["HasSprint", "Session"])]
+    if len(missing):
+        frames.append(
+            pd.concat([defaults] * len(missing)).assign(
+                Race=missing["Race"].repeat(len(defaults)).values,
+                Country=missing["Country"].repeat(len(defaults)).values,
+                EndDate=missing["EndDate"].repeat(len(defaults)).values,
+            )
+        )
+    results_df = (
+        pd.concat(frames)
+        .sort_values("Race", kind="stable")
+        .drop(columns="Race")
+        .reindex(columns=[*RACE_DEFAULT.columns, "Sprint", "Country", "EndDate"])
+    )
+
+    # FIXME type conversion stuff
+    results_df["Points"] = results_df["Points"].astype(float)
+    results_df["Points"] = results_df["Points"] + results_df["FastestLap"]
+    results_df["EndDate"] = pd.to_datetime(results_df["EndDate"]).dt.date
+    return results_df
+
+
+def compact_results(results_df, drivers=(), teams=(), countries=()):
+    """results_df with small types, as load_season returns it
+
+    DriverName, TeamName and Country become categoricals, Position Int8,
+    Points int16 (float32 if there are half points), FastestLap and Sprint
+    boolean. the nullable types leave room for rows without a position or
+    session, like the start rows of the dashboard. drivers, teams and
+    countries are added to the categories, so rows for them can be
+    concatenated without falling back to strings. categories are sorted
+    (plus "" for Country), grouping and sorting give the same order as on
+    strings, group with observed=True to skip unused categories
+    """
+
+    def categories(column, extra):
+        values = pd.concat([results_df[column], pd.Series(extra, dtype="str")])
+        return pd.CategoricalDtype(sorted(values.dropna().unique()))
+
+    points = results_df["Points"]
+    integral = points.notna().all() and (points == points.round()).all()
+    return results_df.astype(
+        {
+            "Position": "Int8",
+            "DriverName": categories("DriverName", drivers),
+            "TeamName": categories("TeamName", teams),
+            "Points": "int16" if integral else "float32",
+            "FastestLap": "boolean",
+            "Sprint": "boolean",
+            "Country": categories("Country", ["", *countries]),
+        }
+    )
 
 
 def get_drivers(year_to_fetch="Current"):
     if year_to_fetch == "Current":
         drivers = []
-        url = "https://www.formula1.com/en/drivers"
-        soup = get_soup(url)
+        url = base_url + "/en/drivers"
+        content = fetch.get_page(url)
+        drivers_df = read_json(url, content, page_json.find_drivers)
+        if drivers_df is not None:
+            return drivers_df
+        soup = make_soup(content)
         links = soup.find_all("a", href=True, class_="group")
         links = [link for link in links if "drivers/" in link["href"]]
         for driver in links:
@@ -256,19 +833,26 @@ def get_drivers(year_to_fetch="Current"):
         return pd.DataFrame(drivers)
     else:
         url = archive_url + year_to_fetch + "/drivers"
-        df = get_table(get_soup(url))
+        content = fetch.get_page(url)
+        df = read_json(url, content, page_json.find_results)
         if df is None:
-            return pd.DataFrame()
+            df = get_table(make_soup(content))
+            if df is None:
+                return pd.DataFrame()
+            df["Driver"] = df["Driver"].str[:-3]
         df.rename(columns={"Driver": "DriverName", "Car": "TeamName"}, inplace=True)
-        df["DriverName"] = df["DriverName"].str[:-3]
         return df[["DriverName", "TeamName"]]
 
 
 def get_teams(year_to_fetch="Current"):
     if year_to_fetch == "Current":
         teams = []
-        url = "https://www.formula1.com/en/teams"
-        soup = get_soup(url)
+        url = base_url + "/en/teams"
+        content = fetch.get_page(url)
+        teams_df = read_json(url, content, page_json.find_teams)
+        if teams_df is not None:
+            return teams_df
+        soup = make_soup(content)
         links = soup.find_all("a", href=True, class_="group")
         for link in links:
             name = link.span.get_text(strip=True)
@@ -291,6 +875,7 @@ def get_teams(year_to_fetch="Current"):
         return df[["TeamName", "Color"]]
 
 
+@cache.ttl_cache(ARCHIVE_TTL)
 def get_available_years():
     """fetch available years in archive"""
     soup = get_soup(archive_url)
@@ -301,3 +886,47 @@ def get_available_years():
         if year.get_text(strip=True).isnumeric()
     ]
     return years
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fetch the results of a season and save them."
+    )
+    parser.add_argument("year", nargs="?", default="Current")
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument(
+        "--sync", action="store_true", help="only fetch missing or changed races"
+    )
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS)
+    args = parser.parse_args()
+
+    # like save_results_to_csv, a full fetch drops the results of races that
+    # are no longer in the season
+    if not args.sync:
+        store.get_store(args.data_folder).clear_results()
+    # results are written together at the end, an interrupted run keeps what it
+    # has. cached pages are revalidated, a run asked for now should not get an
+    # hour old page
+    pending = []
+    try:
+        with fetch.revalidate_mode():
+            for item in stream_results(
+                args.data_folder, args.year, args.sync, args.workers
+            ):
+                line = f"[{item['done']}/{item['total']}] {item['location']}"
+                if item["table"] is None:
+                    print(f"{line}: no new result", flush=True)
+                    continue
+                pending.append((item["location"], item["session"], item["table"]))
+                print(
+                    f"{line} {item['session']}: {item['status']},"
+                    f" {len(item['table'])} rows ({item['seconds']:.2f} s)",
+                    flush=True,
+                )
+    finally:
+        save_results(args.data_folder, pending)
+    print(f"saved {len(pending)} results to {args.data_folder}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import contextvars
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# connect / read timeout in seconds for every request
+REQUEST_TIMEOUT = (5, 30)
+# connections kept alive per host, should be >= data.FETCH_WORKERS
+POOL_SIZE = 16
+# retries on connection errors, 429 and 5xx with exponential backoff
+# (backoff_factor * 2 ** retry seconds, Retry-After is honoured on 429/503)
+RETRIES = 4
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# on-disk page cache: urls/<sha256(url)>.json points to objects/<sha256(body)>.gz
+CACHE_FOLDER = "./.cache/pages"
+CACHE_ENABLED = True
+# seconds a cached page stays fresh before it is revalidated, pages of a past
+# season cached once that season was over never expire (see page_ttl)
+CACHE_TTL = 60 * 60
+# serve cached pages only and never touch the network, the default of the
+# process (see Settings), a session or job can override it with offline_mode
+OFFLINE = False
+_offline = contextvars.ContextVar("offline", default=None)
+# revalidate cached pages even while fresh, see revalidate_mode
+_revalidate = contextvars.ContextVar("revalidate", default=False)
+
+_session = None
+_session_lock = threading.Lock()
+
+# requests, bytes downloaded, cache_hits and not_modified since the last reset
+STATS = {}
+_stats_lock = threading.Lock()
+
+
+def make_session(pool_size=None, retries=None, backoff_factor=None):
+    """create a keep-alive session with a connection pool and retry policy"""
+    pool_size = POOL_SIZE if pool_size is None else pool_size
+    retry = Retry(
+        total=RETRIES if retries is None else retries,
+        backoff_factor=BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """shared module-level session, created on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = make_session()
+    return _session
+
+
+def configure(pool_size=None, retries=None, backoff_factor=None, timeout=None):
+    """change the pool/retry/timeout settings, the session is rebuilt lazily"""
+    global POOL_SIZE, RETRIES, BACKOFF_FACTOR, REQUEST_TIMEOUT, _session
+    with _session_lock:
+        if pool_size is not None:
+            POOL_SIZE = pool_size
+        if retries is not None:
+            RETRIES = retries
+        if backoff_factor is not None:
+            BACKOFF_FACTOR = backoff_factor
+        if timeout is not None:
+            REQUEST_TIMEOUT = timeout
+        old, _session = _session, None
+    if old is not None:
+        old.close()
+
+
+def get(url, **kwargs):
+    """GET through the shared session, raises for 4xx/5xx after the retries"""
+    kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+    response = get_session().get(url, **kwargs)
+    response.raise_for_status()
+    count("requests")
+    count("bytes", len(response.content))
+    return response
+
+
+def count(key, n=1):
+    with _stats_lock:
+        STATS[key] = STATS.get(key, 0) + n
+
+
+def get_stats():
+    with _stats_lock:
+        return dict(STATS)
+
+
+def reset_stats():
+    with _stats_lock:
+        STATS.clear()
+
+
+class PageNotCached(LookupError):
+    """raised in offline mode for pages that were never downloaded"""
+
+
+def configure_cache(folder=None, ttl=None, enabled=None, offline=None):
+    """change the page cache settings"""
+    global CACHE_FOLDER, CACHE_TTL, CACHE_ENABLED, OFFLINE
+    if folder is not None:
+        CACHE_FOLDER = folder
+    if ttl is not None:
+        CACHE_TTL = ttl
+    if enabled is not None:
+        CACHE_ENABLED = enabled
+    if offline is not None:
+        OFFLINE = offline
+
+
+def is_offline():
+    """offline mode of the current session or job, OFFLINE if it has none"""
+    offline = _offline.get()
+    return OFFLINE if offline is None else offline
+
+
+@contextmanager
+def offline_mode(offline):
+    """fetch in (or out of) offline mode within the block, None keeps OFFLINE.
+    applies to the current thread and the threads it starts with a copy of
+    its context (see data.fetch_ordered), not to other sessions"""
+    token = _offline.set(offline)
+    try:
+        yield
+    finally:
+        _offline.reset(token)
+
+
+@contextmanager
+def revalidate_mode(revalidate=True):
+    """within the block every cached page is revalidated with a conditional
+    GET, even while it is fresh, for fetches the user asked for. applies like
+    offline_mode"""
+    token = _revalidate.set(revalidate)
+    try:
+        yield
+    finally:
+        _revalidate.reset(token)
+
+
+def page_ttl(url, fetched_at):
+    """seconds a page cached at fetched_at stays fresh, None if it never
+    changes: a page of a past season cached after the end of its year (one
+    cached while results were still coming in is revalidated as usual)"""
+    years = [int(year) for year in re.findall(r"/(\d{4})(?=/|$)", url)]
+    if years and datetime.fromtimestamp(fetched_at).year > max(years):
+        return None
+    return CACHE_TTL
+
+
+def _digest(value):
+    return hashlib.sha256(value).hexdigest()
+
+
+def _entry_path(url):
+    return os.path.join(CACHE_FOLDER, "urls", _digest(url.encode()) + ".json")
+
+
+def _object_path(digest):
+    return os.path.join(CACHE_FOLDER, "objects", digest[:2], digest + ".gz")
+
+
+def _write_atomic(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as file:
+        file.write(payload)
+    os.replace(tmp, path)
+
+
+def read_cached(url):
+    """cache entry and raw body of a url, (None, None) if not cached"""
+    try:
+        with open(_entry_path(url)) as file:
+            entry = json.load(file)
+        with gzip.open(_object_path(entry["body"]), "rb") as file:
+            return entry, file.read()
+    except (FileNotFoundError, ValueError, KeyError, OSError):
+        return None, None
+
+
+def store_cached(url, body, etag=None, last_modified=None):
+    """store a body once per content and point the url entry at it"""
+    digest = _digest(body)
+    path = _object_path(digest)
+    if not os.path.exists(path):
+        _write_atomic(path, gzip.compress(body))
+    entry = {
+        "url": url,
+        "body": digest,
+        "etag": etag,
+        "last_modified": last_modified,
+        "fetched_at": time.time(),
+    }
+    _write_atomic(_entry_path(url), json.dumps(entry).encode())
+    return entry
+
+
+def _is_fresh(entry, url):
+    ttl = page_ttl(url, entry["fetched_at"])
+    return ttl is None or time.time() - entry["fetched_at"] < ttl
+
+
+def last_modified(url):
+    """Last-Modified of a page as unix timestamp, None if unknown or offline.
+    an error status counts as unknown, the caller then looks at the page"""
+    if is_offline():
+        return None
+    response = get_session().head(url, timeout=REQUEST_TIMEOUT, allow_redirects=True)
+    if not 200 <= response.status_code < 300:
+        return None
+    try:
+        return parsedate_to_datetime(response.headers["Last-Modified"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def get_body(url, revalidate=False):
+    """raw page body, served from the cache while fresh and revalidated after
+
+    revalidate (or revalidate_mode) asks the server even if the cached copy
+    is still fresh
+    """
+    offline = is_offline()
+    entry, body = read_cached(url) if CACHE_ENABLED or offline else (None, None)
+    if offline:
+        if body is None:
+            raise PageNotCached(url)
+        count("cache_hits")
+        return body
+    revalidate = revalidate or _revalidate.get()
+    if body is not None and not revalidate and _is_fresh(entry, url):
+        count("cache_hits")
+        return body
+
+    headers = {}
+    if body is not None:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    response = get(url, headers=headers)
+    if response.status_code == 304:
+        count("not_modified")
+        store_cached(url, body, entry.get("etag"), entry.get("last_modified"))
+        return body
+    if CACHE_ENABLED:
+        store_cached(
+            url,
+            response.content,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+    return response.content
+
+
+def get_page(url, revalidate=False):
+    """download (or load from the cache) a page and return its decoded html"""
+    content = get_body(url, revalidate).decode("utf-8")
+    return content.replace("\xa0", " ")
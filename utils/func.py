@@ -3,27 +3,30 @@ import shutil
 import toml
 
 import streamlit as st
+from utils import cache, fetch, jobs, store
 
 # DATA_FOLDER = settings["dashboard"].get("data_folder", f"./data/")
 SETTINGS_FILE = "settings.toml"
 
+
 def read_settings():
     try:
         settings = toml.load(SETTINGS_FILE)
     except FileNotFoundError:
         # Create a default settings file if it doesn't exist
-        default_settings = {
-            "dashboard": {
-                "data_folder": "./data/"
-            }
-        }
+        default_settings = {"dashboard": {"data_folder": "./data/"}}
         with open(SETTINGS_FILE, "w") as f:
             toml.dump(default_settings, f)
         settings = default_settings
     return settings
 
+
 settings = read_settings()
 DATA_FOLDER = settings["dashboard"].get("data_folder", "./data/")
+store.configure(settings["dashboard"].get("storage", store.BACKEND))
+cache.configure(settings["dashboard"].get("cache_mb", cache.SEASON_CACHE_MB))
+fetch.configure_cache(offline=settings["dashboard"].get("offline", fetch.OFFLINE))
+
 
 def submit():
     st.session_state.current_season = st.session_state.new_season_input
@@ -32,22 +35,50 @@ def submit():
 
 # Utility Functions
 def list_seasons():
-    """List all season folders in the base directory."""
-    return [
-        folder
-        for folder in os.listdir(DATA_FOLDER)
-        if os.path.isdir(os.path.join(DATA_FOLDER, folder))
-    ][::-1]
+    """List all seasons in the base directory, folders and the sqlite store."""
+    return store.list_seasons(DATA_FOLDER)[::-1]
 
 
 def create_season(name):
     """Create a new season folder."""
-    os.makedirs(os.path.join(DATA_FOLDER, name), exist_ok=True)
+    store.get_store(os.path.join(DATA_FOLDER, name)).create()
 
 
 def delete_season(name):
     """Delete an existing season folder."""
-    shutil.rmtree(os.path.join(DATA_FOLDER, name))
+    store.get_store(os.path.join(DATA_FOLDER, name)).drop()
+    shutil.rmtree(os.path.join(DATA_FOLDER, name), ignore_errors=True)
+
+
+def cached_table(data_folder, name, dtype=None):
+    """races, drivers or teams table of a season from the season cache, shared
+    by all sessions. a read-only view, changing it makes a copy.
+    FileNotFoundError if it was never saved"""
+    season_store = store.get_store(data_folder)
+    key = (data_folder, name, tuple(sorted((dtype or {}).items())))
+    return cache.get_season_cache().get(
+        key,
+        season_store.version(name),
+        lambda: season_store.read_table(name, dtype=dtype),
+    )
+
+
+def cached_result(data_folder, location, session="race"):
+    """result of a race or sprint from the season cache, None if there is none"""
+    season_store = store.get_store(data_folder)
+    return cache.get_season_cache().get(
+        (data_folder, f"{session}_{location}"),
+        season_store.version(f"{session}_{location}"),
+        lambda: season_store.read_result(location, session),
+    )
+
+
+def unedited(editor_key):
+    """True if the st.data_editor with editor_key has no changes yet"""
+    state = st.session_state.get(editor_key) or {}
+    return not any(
+        state.get(changes) for changes in ("edited_rows", "added_rows", "deleted_rows")
+    )
 
 
 def refresh_seasons():
@@ -72,14 +103,14 @@ def display_header(header_title):
                 on_change=submit,
             )
             if st.session_state.current_season:
-                os.makedirs(f"./data/{st.session_state.current_season}", exist_ok=True)
+                create_season(st.session_state.current_season)
                 st.success(
                     f"New season '{st.session_state.current_season}' created successfully."
                 )
     with season_control_cols[2]:
         # TODO wenn kein folder da
-        # select season (folders in .data)
-        saved_seasons = os.listdir("./data")[::-1]
+        # select season (from the season index, see store.list_seasons)
+        saved_seasons = list_seasons()
         if (
             st.session_state.current_season
             and st.session_state.current_season in saved_seasons
@@ -101,9 +132,112 @@ def display_header(header_title):
                 f"Delete Season {st.session_state.current_season}?",
                 use_container_width=True,
             ):
-                os.rmdir(f"./data/{st.session_state.current_season}")
+                delete_season(st.session_state.current_season)
                 st.rerun()
                 # st.success(
                 #     f"Season '{st.session_state.current_season}' deleted successfully."
                 # )
     return st.session_state.current_season
+
+
+def report_text(report):
+    return " | ".join(
+        f"{key.capitalize()}: {', '.join(value) or '-'}"
+        for key, value in report.items()
+    )
+
+
+def job_title(job):
+    if job["kind"] == "migrate":
+        return f"Convert to {job['storage']}"
+    return f"{job['kind'].capitalize()} {job['year_to_fetch']}"
+
+
+def submit_fetch(kind, data_folder):
+    """queue a fetch job for the year and offline mode picked in the Config
+    sidebar, returns its id"""
+    return jobs.get_runner().submit(
+        kind,
+        data_folder,
+        st.session_state.year_to_fetch,
+        offline=st.session_state.get("offline"),
+    )
+
+
+@st.fragment(run_every=2)
+def show_jobs(data_folder, kinds, on_result=None):
+    """progress of the background jobs of a tab, polled every 2 seconds
+
+    when a job watched by this session finishes, on_result(table) is called
+    with its fetched table (if any) and the page is rerun
+    """
+    runner = jobs.get_runner()
+    watched = st.session_state.setdefault("watched_jobs", set())
+    applied = st.session_state.setdefault("applied_jobs", set())
+    job_list = runner.list(data_folder=data_folder, kinds=kinds)
+
+    for job in job_list:
+        if job["status"] in jobs.ACTIVE:
+            watched.add(job["id"])
+            progress = job["progress"]
+            done, total = progress["done"], progress["total"]
+            text = f"{job_title(job)}: {job['status']}"
+            if total:
+                text += f" {done}/{total} {progress['current'] or ''}"
+            cols = st.columns([6, 1], vertical_alignment="center")
+            cols[0].progress(done / total if total else 0.0, text=text)
+            if job["report"]:
+                cols[0].caption(report_text(job["report"]))
+            # cancelled before the rerun of the click, full or fragment
+            cols[1].button(
+                "Cancel",
+                key=f"cancel_job_{job['id']}",
+                disabled=job["cancelling"],
+                use_container_width=True,
+                on_click=runner.cancel,
+                args=(job["id"],),
+            )
+        elif job["id"] in watched:
+            watched.discard(job["id"])
+            applied.add(job["id"])
+            result = runner.result(job["id"])
+            if on_result is not None and result is not None:
+                on_result(result)
+            st.rerun()
+
+    # newest finished job, also from before a reload of the browser tab
+    finished = [job for job in job_list if job["status"] not in jobs.ACTIVE]
+    if not finished:
+        return
+    job = finished[0]
+    message = f"{job_title(job)}: {job['status']}"
+    if job["report"]:
+        message += " | " + report_text(job["report"])
+    if job["status"] == "failed":
+        message += f": {job['error']}"
+    cols = st.columns([6, 1], vertical_alignment="center")
+    if job["status"] == "done":
+        cols[0].success(message)
+    elif job["status"] == "failed":
+        cols[0].error(message)
+    else:
+        cols[0].info(message)
+    if (
+        on_result is not None
+        and job["id"] not in applied
+        and runner.result(job["id"]) is not None
+        and cols[1].button(
+            "Load", key=f"load_job_{job['id']}", use_container_width=True
+        )
+    ):
+        applied.add(job["id"])
+        on_result(runner.result(job["id"]))
+        st.rerun()
+
+
+def show_conflict(error, on_reload):
+    """a save that lost against someone else's (store.WriteConflict), the
+    Reload button calls on_reload to drop the edits and read the data again"""
+    cols = st.columns([6, 1], vertical_alignment="center")
+    cols[0].error(f"Not saved: {error}")
+    cols[1].button("Reload", on_click=on_reload, use_container_width=True)
@@ -0,0 +1,80 @@
+"""derived tables of one dashboard rerun, each computed once
+
+a Graph is made of nodes, plain functions whose parameters name what they
+are computed from: inputs given to the graph, other nodes or parameters of
+the call like the entity. graph(name, **params) computes a node the first
+time it is asked for with those params and hands out the same value after
+that, so sections needing the same table share it. params a dependency
+takes are passed on to it.
+
+inputs come in as the widgets of the rerun are read (see provide) and stay
+fixed for the rest of it, a graph lives for one rerun. values are shared,
+do not mutate them. stats() counts per node how often it was computed, how
+often a computed value was reused and the time spent in it
+"""
+
+import inspect
+import time
+
+import pandas as pd
+
+
+class Graph:
+    def __init__(self, nodes, **inputs):
+        self.nodes = {node.__name__: node for node in nodes}
+        self.parameters = {
+            name: list(inspect.signature(node).parameters)
+            for name, node in self.nodes.items()
+        }
+        self.inputs = {}
+        self.values = {}
+        self.counts = {name: [0, 0, 0.0] for name in self.nodes}
+        self.provide(**inputs)
+
+    def provide(self, **inputs):
+        """add inputs, ValueError for one that is set already or a node name"""
+        for name in inputs:
+            if name in self.inputs or name in self.nodes:
+                raise ValueError(f"{name} is already part of the graph")
+        self.inputs.update(inputs)
+
+    def __call__(self, name, **params):
+        """value of the node name for params, computed on first use"""
+        key = (name, tuple(sorted(params.items())))
+        counts = self.counts[name]
+        if key in self.values:
+            counts[1] += 1
+            return self.values[key]
+        arguments = {}
+        for parameter in self.parameters[name]:
+            if parameter in params:
+                arguments[parameter] = params[parameter]
+            elif parameter in self.inputs:
+                arguments[parameter] = self.inputs[parameter]
+            elif parameter in self.nodes:
+                arguments[parameter] = self(
+                    parameter,
+                    **{
+                        param: value
+                        for param, value in params.items()
+                        if param in self.parameters[parameter]
+                    },
+                )
+            else:
+                raise KeyError(f"{name} needs {parameter}, which is not provided")
+        start = time.perf_counter()
+        value = self.nodes[name](**arguments)
+        counts[0] += 1
+        counts[2] += time.perf_counter() - start
+        self.values[key] = value
+        return value
+
+    def stats(self):
+        """Node, Computed, Hits and ms spent per node, in the order of nodes"""
+        return pd.DataFrame(
+            [
+                (name, computed, hits, seconds * 1000)
+                for name, (computed, hits, seconds) in self.counts.items()
+            ],
+            columns=["Node", "Computed", "Hits", "ms"],
+        )
@@ -0,0 +1,86 @@
+"""what there is to know about the seasons of a data folder at a glance
+
+<data folder>/index.json has an entry per season, stamped by store on every
+write to the season (see store.update_index). seasons(data_folder) fills in
+the rest for the seasons written since their entry was computed, from their
+standings, the others are not looked at. season(data_folder, name) does the
+same for one season:
+
+updated    time of the last write to the season
+races      races in the season
+completed  races with a saved result
+leader     driver with the most points, None before the first result
+points     points of the leader
+computed   the updated time the entry was computed for
+"""
+
+import os
+
+from utils import standings, store
+
+FIELDS = ["races", "completed", "leader", "points"]
+
+
+def _describe(folder):
+    try:
+        season_standings = standings.load(folder)
+    except FileNotFoundError:
+        return {"races": 0, "completed": 0, "leader": None, "points": 0.0}
+    races = season_standings.races
+    points = season_standings.season_points("DriverName")
+    leader = None
+    if len(points) and points.max() > 0:
+        leader = points.idxmax()
+    return {
+        "races": len(races),
+        "completed": int((races["RaceSaved"] > 0).sum()),
+        "leader": leader,
+        "points": float(points.max()) if leader is not None else 0.0,
+    }
+
+
+def _refresh(data_folder, entries, wanted):
+    """entries with those of the wanted seasons that are stale computed again"""
+    stale = {
+        season: entries[season]["updated"]
+        for season in wanted
+        if season in entries
+        and entries[season].get("computed") != entries[season]["updated"]
+    }
+    if not stale:
+        return entries
+    described = {
+        season: _describe(os.path.join(data_folder, season)) for season in stale
+    }
+
+    def change(index):
+        # a season written in the meantime stays stale for the next call
+        for season, updated in stale.items():
+            if season in index:
+                index[season].update(described[season], computed=updated)
+
+    return store.update_index(data_folder, change)
+
+
+def seasons(data_folder):
+    """{season: entry} of every season in the data folder, oldest first.
+    FileNotFoundError if the data folder does not exist"""
+    entries = store.current_index(data_folder)
+    return dict(sorted(_refresh(data_folder, entries, entries).items()))
+
+
+def season(data_folder, name):
+    """entry of the season name, {} if there is none. only this season is
+    looked at, the other stale ones are left for later"""
+    entries = store.current_index(data_folder)
+    return _refresh(data_folder, entries, [name]).get(name, {})
+
+
+def describe(entry):
+    """one line about a season entry"""
+    if entry.get("races") is None:
+        return "not looked at yet"
+    text = f"{entry['completed']} of {entry['races']} races"
+    if entry["leader"] is not None:
+        text += f", {entry['leader']} leads with {entry['points']:g} points"
+    return text
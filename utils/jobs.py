@@ -0,0 +1,264 @@
+"""background fetch (and storage conversion) jobs that run outside the
+streamlit rerun cycle
+
+a process-wide JobRunner executes the jobs in a small thread pool. every
+state change is written to JOBS_FOLDER/jobs.json, and fetched tables to
+JOBS_FOLDER/<id>.csv, so a reloaded browser tab can pick up the status and
+results again. jobs that were queued or running when the server stopped are
+queued again when the runner starts.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from utils import data, fetch, store
+
+JOBS_FOLDER = "./.cache/jobs"
+JOB_WORKERS = 2
+# finished jobs kept in the job list
+KEEP_FINISHED = 50
+
+ACTIVE = ("queued", "running")
+
+# columns to parse as dates when a fetched table is read back from disk
+RESULT_DATES = {"races": ["StartDate", "EndDate"]}
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def fetch_races(job, progress):
+    return data.get_races(year_to_fetch=job["year_to_fetch"])
+
+
+def fetch_teams(job, progress):
+    return data.get_teams(year_to_fetch=job["year_to_fetch"])
+
+
+def fetch_drivers(job, progress):
+    return data.get_drivers(year_to_fetch=job["year_to_fetch"])
+
+
+def fetch_results(job, progress):
+    return data.save_results_to_csv(
+        datafolder=job["data_folder"],
+        year_to_fetch=job["year_to_fetch"],
+        progress=progress,
+    )
+
+
+def sync_results(job, progress):
+    return data.save_results_to_csv(
+        datafolder=job["data_folder"],
+        year_to_fetch=job["year_to_fetch"],
+        incremental=True,
+        progress=progress,
+    )
+
+
+def migrate_seasons(job, progress):
+    """convert every season of the data folder to the storage of the job, one
+    at a time, a cancelled job stops between two seasons"""
+    seasons = store.list_seasons(job["data_folder"])
+    report = {"converted": [], "unchanged": []}
+    for done, season in enumerate(seasons, start=1):
+        folder = os.path.join(job["data_folder"], season)
+        if store.get_store(folder).name == job["storage"]:
+            report["unchanged"].append(season)
+        else:
+            store.migrate(folder, job["storage"])
+            report["converted"].append(season)
+        progress(done, len(seasons), season, report)
+    return report
+
+
+# job kind -> function(job, progress), a returned DataFrame is kept as the
+# job result, anything else is stored as the job report
+JOB_KINDS = {
+    "races": fetch_races,
+    "teams": fetch_teams,
+    "drivers": fetch_drivers,
+    "results": fetch_results,
+    "sync": sync_results,
+    "migrate": migrate_seasons,
+}
+
+
+class JobRunner:
+    def __init__(self, folder=JOBS_FOLDER, workers=JOB_WORKERS):
+        self.folder = folder
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="df1sh-job"
+        )
+        self.results = {}
+        self.cancelled = set()
+        self.jobs = self._load()
+        for job in self.jobs.values():
+            if job["status"] in ACTIVE:
+                job["status"] = "queued"
+                self.executor.submit(self._run, job["id"])
+
+    def _load(self):
+        try:
+            with open(os.path.join(self.folder, "jobs.json")) as file:
+                return {job["id"]: job for job in json.load(file)}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        finished = [job for job in self.jobs.values() if job["status"] not in ACTIVE]
+        for job in sorted(finished, key=lambda job: job["created"])[:-KEEP_FINISHED]:
+            del self.jobs[job["id"]]
+            self.results.pop(job["id"], None)
+            if os.path.exists(self._result_path(job["id"])):
+                os.remove(self._result_path(job["id"]))
+        os.makedirs(self.folder, exist_ok=True)
+        path = os.path.join(self.folder, "jobs.json")
+        with open(path + ".tmp", "w") as file:
+            json.dump(list(self.jobs.values()), file, default=str)
+        os.replace(path + ".tmp", path)
+
+    def _result_path(self, job_id):
+        return os.path.join(self.folder, f"{job_id}.csv")
+
+    def submit(self, kind, data_folder, year_to_fetch=None, offline=None, storage=None):
+        """queue a job, returns its id. offline is the offline mode of the
+        session it comes from, None for that of the process (fetch.OFFLINE).
+        storage is the layout a migrate job converts the seasons to"""
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "data_folder": data_folder,
+            "year_to_fetch": year_to_fetch,
+            "offline": offline,
+            "storage": storage,
+            "status": "queued",
+            "progress": {"done": 0, "total": None, "current": None},
+            "report": None,
+            "error": None,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+        }
+        with self.lock:
+            self.jobs[job["id"]] = job
+            self._save()
+        self.executor.submit(self._run, job["id"])
+        return job["id"]
+
+    def _progress(self, job_id):
+        def progress(done, total, current=None, report=None):
+            with self.lock:
+                self.jobs[job_id]["progress"] = {
+                    "done": done,
+                    "total": total,
+                    "current": current,
+                }
+                if report is not None:
+                    # partial report, the job keeps adding to its own copy
+                    self.jobs[job_id]["report"] = {
+                        key: list(value) for key, value in report.items()
+                    }
+                self._save()
+                if job_id in self.cancelled:
+                    raise JobCancelled(job_id)
+
+        return progress
+
+    def _run(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return
+            job["status"] = "running"
+            job["started"] = time.time()
+            self._save()
+
+        status, result, error = "done", None, None
+        try:
+            # a job is a fetch the user asked for, no page is served stale
+            with fetch.offline_mode(job.get("offline")), fetch.revalidate_mode():
+                result = JOB_KINDS[job["kind"]](job, self._progress(job_id))
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as exception:
+            status, error = "failed", repr(exception)
+
+        with self.lock:
+            if isinstance(result, pd.DataFrame):
+                os.makedirs(self.folder, exist_ok=True)
+                result.to_csv(self._result_path(job_id), index=False)
+                self.results[job_id] = result
+            elif result is not None:
+                job["report"] = result
+            job["status"] = status
+            job["error"] = error
+            job["finished"] = time.time()
+            self.cancelled.discard(job_id)
+            self._save()
+
+    def cancel(self, job_id):
+        """drop a queued job, running jobs stop at their next progress update"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            if job["status"] == "queued":
+                job["status"] = "cancelled"
+                job["finished"] = time.time()
+                self._save()
+            elif job["status"] == "running":
+                self.cancelled.add(job_id)
+
+    def get(self, job_id):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return (
+                None if job is None else dict(job, cancelling=job_id in self.cancelled)
+            )
+
+    def list(self, data_folder=None, kinds=None):
+        """jobs, newest first"""
+        with self.lock:
+            jobs = [
+                self.get(job["id"])
+                for job in self.jobs.values()
+                if (data_folder is None or job["data_folder"] == data_folder)
+                and (kinds is None or job["kind"] in kinds)
+            ]
+        return sorted(jobs, key=lambda job: job["created"], reverse=True)
+
+    def result(self, job_id):
+        """fetched table of a finished job, None if it has none"""
+        with self.lock:
+            if job_id in self.results:
+                return self.results[job_id]
+            job = self.jobs.get(job_id)
+        path = self._result_path(job_id)
+        if job is None or not os.path.exists(path):
+            return None
+        result = pd.read_csv(path, parse_dates=RESULT_DATES.get(job["kind"], False))
+        with self.lock:
+            self.results[job_id] = result
+        return result
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_runner():
+    """the runner shared by all sessions of this process"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner()
+        return _runner
@@ -0,0 +1,236 @@
+"""structured data embedded in the formula1.com pages
+
+the pages are rendered by next.js and ship their data as json next to the
+html: a __NEXT_DATA__ script, the self.__next_f.push(...) flight chunks and
+schema.org ld+json blocks. these are cut out of the raw html with regexes
+(no html tree is built) and decoded in one go. the finders below look for
+the records the scrapers need by their keys instead of by position, so
+they do not depend on the layout of the page. every finder returns None if
+nothing fitting is found, the caller then falls back to the dom scrapers.
+"""
+
+import json
+import re
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+NEXT_DATA_RE = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+LD_JSON_RE = re.compile(
+    r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL
+)
+FLIGHT_RE = re.compile(r"self\.__next_f\.push\((\[.*?\])\)</script>", re.DOTALL)
+FLIGHT_ROW_RE = re.compile(r"^[0-9a-f]+:(?=[\[{])", re.MULTILINE)
+
+POSITION_KEYS = ("positionNumber", "positionText", "position", "pos")
+FIRST_NAME_KEYS = ("driverFirstName", "firstName", "givenName")
+LAST_NAME_KEYS = ("driverLastName", "lastName", "familyName")
+FULL_NAME_KEYS = ("driverFullName", "driverName", "fullName")
+TEAM_KEYS = ("teamName", "constructorName", "team", "constructor")
+POINTS_KEYS = ("racePoints", "points", "pts")
+NUMBER_KEYS = ("racingNumber", "driverNumber", "carNumber", "number")
+LAPS_KEYS = ("lapsCompleted", "laps")
+TIME_KEYS = ("raceTime", "gapToLeader", "time", "status")
+START_KEYS = ("meetingStartDate", "startDate")
+END_KEYS = ("meetingEndDate", "endDate")
+CIRCUIT_KEYS = ("circuitOfficialName", "circuitShortName", "circuitName")
+CITY_KEYS = ("meetingLocation", "city", "addressLocality", "locality")
+COLOR_KEYS = ("teamColour", "teamColor", "colour", "color", "hexColor")
+
+
+def _flight_payloads(content):
+    chunks = []
+    for match in FLIGHT_RE.finditer(content):
+        try:
+            chunk = loads(match.group(1))
+        except ValueError:
+            continue
+        if len(chunk) > 1 and isinstance(chunk[1], str):
+            chunks.append(chunk[1])
+    flight = "".join(chunks)
+    # rows look like `1f:["$","div",...]`, decode each json row on its own
+    starts = [match.end() for match in FLIGHT_ROW_RE.finditer(flight)]
+    ends = [match.start() for match in FLIGHT_ROW_RE.finditer(flight)][1:] + [len(flight)]
+    for start, end in zip(starts, ends):
+        try:
+            yield loads(flight[start:end])
+        except ValueError:
+            continue
+
+
+def extract(content):
+    """all json payloads embedded in a page"""
+    payloads = []
+    for regex in (NEXT_DATA_RE, LD_JSON_RE):
+        for match in regex.finditer(content):
+            try:
+                payloads.append(loads(match.group(1)))
+            except ValueError:
+                continue
+    payloads.extend(_flight_payloads(content))
+    return payloads
+
+
+def walk(payloads):
+    """every dict and list nested anywhere in the payloads"""
+    stack = [payloads]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            yield node
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            yield node
+            stack.extend(reversed(node))
+
+
+def _first(record, keys):
+    for key in keys:
+        value = record.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _name(value):
+    if isinstance(value, dict):
+        return _first(value, ("name", "fullName", "teamName"))
+    return value
+
+
+def _driver_name(record):
+    driver = record.get("driver") if isinstance(record.get("driver"), dict) else record
+    first, last = _first(driver, FIRST_NAME_KEYS), _first(driver, LAST_NAME_KEYS)
+    if first and last:
+        return f"{first} {last}"
+    name = _first(driver, FULL_NAME_KEYS)
+    return name if isinstance(name, str) else None
+
+
+def _records(payloads, is_record, min_length=3):
+    """first list of dicts of which (almost) all are records"""
+    for node in walk(payloads):
+        if not isinstance(node, list) or len(node) < min_length:
+            continue
+        dicts = [item for item in node if isinstance(item, dict)]
+        if len(dicts) >= min_length and sum(map(is_record, dicts)) >= 0.9 * len(node):
+            return dicts
+    return None
+
+
+def _is_result(record):
+    return _first(record, POSITION_KEYS) is not None and _driver_name(record) is not None
+
+
+def _position(value):
+    if isinstance(value, str) and value.isnumeric():
+        return int(value)
+    return value
+
+
+def find_results(payloads):
+    """race/sprint result table in the same columns as the dom table
+
+    driver names come without the 3 letter abbreviation, this is marked by
+    df.attrs["source"] = "json"
+    """
+    records = _records(payloads, _is_result)
+    if records is None:
+        return None
+    df = pd.DataFrame(
+        {
+            "Pos": [_position(_first(record, POSITION_KEYS)) for record in records],
+            "No": [_first(record, NUMBER_KEYS) for record in records],
+            "Driver": [_driver_name(record) for record in records],
+            "Car": [_name(_first(record, TEAM_KEYS)) for record in records],
+            "Laps": [_first(record, LAPS_KEYS) for record in records],
+            "Time/retired": [_first(record, TIME_KEYS) for record in records],
+            "Pts": [_first(record, POINTS_KEYS) or 0 for record in records],
+        }
+    )
+    df.attrs["source"] = "json"
+    return df
+
+
+def _date(value):
+    if isinstance(value, str) and len(value) >= 10:
+        try:
+            return datetime.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def find_race_info(payloads):
+    """start/end date, city and circuit of a race weekend"""
+    for node in walk(payloads):
+        if not isinstance(node, dict):
+            continue
+        start_date, end_date = _date(_first(node, START_KEYS)), _date(_first(node, END_KEYS))
+        if start_date is None or end_date is None:
+            continue
+        circuit = _name(_first(node, CIRCUIT_KEYS) or node.get("location"))
+        city = _first(node, CITY_KEYS)
+        if city is None and isinstance(node.get("location"), dict):
+            city = _first(node["location"].get("address") or {}, CITY_KEYS)
+        if isinstance(circuit, str) and isinstance(city, str):
+            return {
+                "start_date": start_date,
+                "end_date": end_date,
+                "city": city,
+                "circuit": circuit,
+            }
+    return None
+
+
+def _color(value):
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lstrip("#")
+    if re.fullmatch(r"[0-9a-fA-F]{6}", value):
+        return "#" + value.upper()
+    return None
+
+
+def find_teams(payloads):
+    """TeamName, Color of the current teams"""
+    records = _records(
+        payloads,
+        lambda record: isinstance(_first(record, TEAM_KEYS + ("name",)), str)
+        and _color(_first(record, COLOR_KEYS)) is not None,
+    )
+    if records is None:
+        return None
+    return pd.DataFrame(
+        {
+            "TeamName": [_first(record, TEAM_KEYS + ("name",)) for record in records],
+            "Color": [_color(_first(record, COLOR_KEYS)) for record in records],
+        }
+    ).drop_duplicates("TeamName")
+
+
+def find_drivers(payloads):
+    """DriverName, TeamName of the current drivers"""
+    records = _records(
+        payloads,
+        lambda record: _driver_name(record) is not None
+        and isinstance(_name(_first(record, TEAM_KEYS)), str)
+        and _first(record, POSITION_KEYS) is None,
+    )
+    if records is None:
+        return None
+    return pd.DataFrame(
+        {
+            "DriverName": [_driver_name(record) for record in records],
+            "TeamName": [_name(_first(record, TEAM_KEYS)) for record in records],
+        }
+    ).drop_duplicates("DriverName")
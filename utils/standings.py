@@ -0,0 +1,385 @@
+"""standings of a season, kept next to its data and updated on write
+
+the dashboard shows points, result rows and finishing positions per driver
+and team over a range of races. instead of aggregating every result row on
+each rerun, running totals are kept in <season folder>/standings.npz, one per
+race and (DriverName, TeamName, Sprint) pair, and a range is the difference
+of the totals after its last race and before its first:
+
+races   Country, EndDate, HasSprint and the save times of the race and sprint
+        results (0 if there is none) the totals were computed from
+pairs   DriverName, TeamName and Sprint of every pair with result rows
+totals  array (race, pair, field) summed up to and including the race,
+        fields are Points, Rows and a count for each finishing position in
+        positions
+first   array (race, pair) with the row of the pair's first result in that
+        race or sprint, NaN if it has none. names are listed in the order
+        they turn up in the results
+
+the arrays are saved with np.savez, races, pairs and positions go into a json
+header next to them. nothing in the file is unpickled on reading.
+
+load(folder) brings the file up to date, computing only the races from the
+first one whose entry or results changed since it was written. after
+saving the result of a single race, update(folder, location) does the same
+from that race on. the file is derived data, if it is missing or cannot be
+read it is computed from scratch
+"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from utils import data, store
+
+FILE_NAME = "standings.npz"
+# bump when the layout of the file changes, older files are computed again
+VERSION = 2
+FIELDS = ["Points", "Rows"]
+PAIR_KEYS = ["DriverName", "TeamName", "Sprint"]
+# season folder -> seconds the last load or update took
+LOAD_TIMES = {}
+
+
+def _names(df):
+    """DriverName and TeamName of df as strings, missing names stay missing
+    (astype("str") of pandas before 3 turns them into "nan" or "None")"""
+    names = df[["DriverName", "TeamName"]]
+    return names.astype("str").where(names.notna())
+
+
+def _first_seen(values):
+    """the distinct values in the order they first turn up"""
+    _, first = np.unique(values, return_index=True)
+    return values[np.sort(first)]
+
+
+class Standings:
+    def __init__(self, races, pairs, positions, totals, first):
+        self.races = races
+        self.pairs = pairs
+        self.positions = positions
+        self.totals = totals
+        self.first = first
+
+    def _mask(self, entity=None, teams=None, sprint=None):
+        """pairs that count: entity and, for drivers, team names set, teams
+        a list of team names (None for all), sprint True, False or None"""
+        mask = np.ones(len(self.pairs), dtype=bool)
+        if entity is not None:
+            mask &= self.pairs[entity].notna().to_numpy()
+        if teams is not None:
+            mask &= self.pairs["TeamName"].isin(teams).to_numpy()
+        if sprint is not None:
+            mask &= (self.pairs["Sprint"] == sprint).to_numpy()
+        return mask
+
+    def _before(self, start):
+        if start == 0:
+            return np.zeros_like(self.totals[:1])
+        return self.totals[start - 1 : start]
+
+    def between(self, start, end):
+        """array (pair, field), totals of the races start to end (positions in races)"""
+        return self.totals[end] - self._before(start)[0]
+
+    def per_race(self, start, end):
+        """array (race, pair, field) of what every race from start to end added"""
+        totals = self.totals[start : end + 1]
+        return np.diff(np.concatenate([self._before(start), totals]), axis=0)
+
+    def _by_entity(self, entity, values, mask):
+        """values (..., pair) summed per entity name over the pairs in mask"""
+        names = self.pairs.loc[mask, entity]
+        frame = pd.DataFrame(values[..., mask].T, index=names.values)
+        return frame.groupby(level=0, sort=True).sum()
+
+    def season_points(self, entity):
+        """points per entity over the whole season, by name"""
+        if not len(self.races):
+            return pd.Series(dtype="float64")
+        mask = self._mask(entity) & (self.totals[-1, :, 1] > 0)
+        return self._by_entity(entity, self.totals[-1, :, 0], mask)[0]
+
+    def names(self, entity, start, end, teams=None, start_rows=None):
+        """names of the entity in the order they turn up in the races start to
+        end, after those in start_rows. like Series.unique, NaN is a name too"""
+        first = self.first[start : end + 1]
+        race, pair = np.nonzero(~np.isnan(first))
+        keep = self._mask(teams=teams)[pair]
+        rows = pd.DataFrame(
+            {
+                "Race": race[keep],
+                "Sprint": self.pairs["Sprint"].to_numpy()[pair[keep]],
+                "First": first[race[keep], pair[keep]],
+                "Name": self.pairs[entity].to_numpy()[pair[keep]],
+            }
+        ).sort_values(["Race", "Sprint", "First"], kind="stable")
+        names = rows["Name"]
+        if start_rows is not None:
+            names = pd.concat([start_rows[entity], names])
+        return list(pd.unique(names.to_numpy(dtype=object)))
+
+    def points_over_time(
+        self, entity, start, end, teams=None, start_rows=None, start_date=None
+    ):
+        """points of every entity summed up after each race from start to end
+
+        rows Country, entity, Points. races without results are left out,
+        start_rows (DriverName, TeamName) add a first "" row dated start_date
+        with 0 points. columns come in the order of their first race, team and
+        name, like a pivot of the sorted results
+
+        entities and races get integer codes, the points are added up into an
+        (entity, race) matrix with one scatter-add and one cumsum, row 0 of it
+        being the start row
+        """
+        pairs = np.flatnonzero(self._mask(entity) & self._mask("TeamName", teams))
+        totals = self.totals[start : end + 1][:, pairs, :2]
+        per_race = np.diff(
+            np.concatenate([self._before(start)[:, pairs, :2], totals]), axis=0
+        )
+        race, pair = np.nonzero(per_race[:, :, 1] > 0)
+        races = self.races.iloc[start : end + 1]
+        team_names = self.pairs["TeamName"].to_numpy(dtype=object)[pairs]
+        names = self.pairs[entity].to_numpy(dtype=object)[pairs]
+        if start_rows is not None:
+            start_rows = start_rows.dropna(subset=list({"TeamName", entity}))
+        else:
+            start_rows = pd.DataFrame({"TeamName": [], entity: []})
+
+        # entries: a row per start row and per race a pair has results in,
+        # race code 0 is the start row. the sort keys are ranked once per
+        # race, team and entity and looked up by code
+        starts = len(start_rows)
+        countries = np.concatenate([[""], races["Country"].to_numpy(dtype=object)])
+        dates = np.concatenate([[start_date], races["EndDate"].to_numpy(dtype=object)])
+        codes, entities = pd.factorize(
+            np.concatenate([start_rows[entity].to_numpy(dtype=object), names])
+        )
+        team_codes = pd.factorize(
+            np.concatenate([start_rows["TeamName"].to_numpy(dtype=object), team_names]),
+            sort=True,
+        )[0]
+        entry_race = np.concatenate([np.zeros(starts, dtype=int), race + 1])
+        entry_entity = np.concatenate([codes[:starts], codes[starts:][pair]])
+        entry_team = np.concatenate([team_codes[:starts], team_codes[starts:][pair]])
+
+        # a stable sort by end date, team, name and country, lexsort takes
+        # the first key last
+        order = np.lexsort(
+            [
+                pd.factorize(countries, sort=True)[0][entry_race],
+                np.argsort(np.argsort(entities, kind="stable"))[entry_entity],
+                entry_team,
+                pd.factorize(dates, sort=True)[0][entry_race],
+            ]
+        )
+        rows = _first_seen(entry_race[order])
+        columns = _first_seen(entry_entity[order])
+
+        points = np.zeros((len(entities), len(races) + 1))
+        np.add.at(points[:, 1:], codes[starts:], per_race[:, :, 0].T)
+        points = points[np.ix_(columns, rows)].T.cumsum(axis=0)
+        countries = pd.array(countries[rows], dtype="str")
+        entities = pd.array(entities[columns], dtype="str")
+        return pd.DataFrame(
+            {
+                "Country": countries.take(
+                    np.repeat(np.arange(len(rows)), len(columns))
+                ),
+                entity: entities.take(np.tile(np.arange(len(columns)), len(rows))),
+                "Points": points.ravel(),
+            }
+        )
+
+    def points(self, entity, start, end, how="sum", teams=None, start_rows=None):
+        """Points per entity over the races start to end, "sum" or "mean" per
+        result row. start_rows count as rows without points"""
+        mask = self._mask(entity, teams)
+        totals = self._by_entity(entity, self.between(start, end)[:, :2].T, mask)
+        if start_rows is not None:
+            starts = start_rows[entity].dropna().value_counts()
+            totals = totals.reindex(totals.index.union(starts.index), fill_value=0)
+            totals[1] += starts.reindex(totals.index, fill_value=0)
+        totals = totals[totals[1] > 0]
+        points = totals[0] if how == "sum" else totals[0] / totals[1]
+        return points.rename("Points").rename_axis(entity).round(2).reset_index()
+
+    def position_counts(self, entity, start, end, teams=None, sprint=None):
+        """how often each entity finished in each position in the races start
+        to end, positions that did not happen are left out"""
+        mask = self._mask(entity, teams, sprint)
+        counts = self._by_entity(entity, self.between(start, end)[:, 2:].T, mask)
+        counts.columns = self.positions
+        counts = counts.loc[counts.sum(axis=1) > 0, counts.sum(axis=0) > 0]
+        return counts.rename_axis(index=entity, columns="Position")
+
+    def points_by_race(self, entity, start, end, teams=None, sprint=None):
+        """points of every entity in each race from start to end, entity x Country"""
+        mask = self._mask(entity, teams, sprint)
+        points = self._by_entity(entity, self.per_race(start, end)[:, :, 0], mask)
+        points.columns = self.races["Country"].iloc[start : end + 1].to_numpy()
+        return points.rename_axis(index=entity, columns="Country")
+
+
+def _path(folder):
+    return os.path.join(folder, FILE_NAME)
+
+
+def _read(folder):
+    try:
+        with np.load(_path(folder), allow_pickle=False) as content:
+            header = json.loads(content["header"].item())
+            if header.get("version") != VERSION:
+                return None
+            totals, first = content["totals"], content["first"]
+    except (OSError, EOFError, KeyError, ValueError, zipfile.BadZipFile):
+        return None
+    races = pd.DataFrame(header["races"])
+    races["EndDate"] = pd.to_datetime(races["EndDate"]).dt.date
+    pairs = pd.DataFrame(header["pairs"], columns=PAIR_KEYS)
+    pairs[["DriverName", "TeamName"]] = _names(pairs)
+    pairs["Sprint"] = pairs["Sprint"].astype(bool)
+    return Standings(races, pairs, header["positions"], totals, first)
+
+
+def _write(folder, standings):
+    # seasons in the sqlite store have no folder of their own yet
+    os.makedirs(folder, exist_ok=True)
+    path = _path(folder)
+    # seasons can be loaded by several threads at once, see career
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pairs = standings.pairs.astype(object).where(standings.pairs.notna(), None)
+    header = {
+        "version": VERSION,
+        "races": standings.races.to_dict(orient="list"),
+        "pairs": pairs.to_dict(orient="list"),
+        "positions": [int(position) for position in standings.positions],
+    }
+    with open(tmp, "wb") as f:
+        np.savez(
+            f,
+            header=np.array(json.dumps(header, default=str)),
+            totals=standings.totals,
+            first=standings.first,
+        )
+    os.replace(tmp, path)
+
+
+def _races(season_store):
+    """races of the season with the save times of their results"""
+    races = season_store.read_table("races")
+    saved = season_store.saved_times()
+    return pd.DataFrame(
+        {
+            "Country": races["Country"],
+            "EndDate": pd.to_datetime(races["EndDate"]).dt.date,
+            "HasSprint": races["HasSprint"].astype(bool),
+            "RaceSaved": [saved.get(f"race_{c}", 0.0) for c in races["Country"]],
+            "SprintSaved": [saved.get(f"sprint_{c}", 0.0) for c in races["Country"]],
+        }
+    )
+
+
+def _first_change(old, races):
+    """position of the first race that differs between old standings and races"""
+    if old is None:
+        return 0
+    same = min(len(old.races), len(races))
+    for i, (before, now) in enumerate(
+        zip(old.races.head(same).itertuples(), races.head(same).itertuples())
+    ):
+        if before[1:] != now[1:]:
+            return i
+    return same
+
+
+def _compute(old, races, season_store, start):
+    """standings of races, old ones are kept for the races before start"""
+    countries = races["Country"].tolist()
+    rows = data.season_results(
+        races.iloc[start:], season_store.read_results(locations=countries[start:])
+    )
+    rows["Race"] = rows["Country"].map({c: i for i, c in enumerate(countries)})
+    rows["First"] = rows.index
+    rows[["DriverName", "TeamName"]] = _names(rows)
+
+    if old is None:
+        old = Standings(races.head(0), pd.DataFrame(columns=PAIR_KEYS), [], None, None)
+        start = 0
+    # pairs and positions seen before keep their place in the arrays
+    pairs = pd.concat([old.pairs, rows[PAIR_KEYS]]).drop_duplicates(ignore_index=True)
+    pairs[["DriverName", "TeamName"]] = _names(pairs)
+    pairs["Sprint"] = pairs["Sprint"].astype(bool)
+    positions = sorted(
+        set(old.positions) | set(rows["Position"].dropna().astype(int).tolist())
+    )
+    rows = rows.merge(pairs.reset_index(names="Pair"), on=PAIR_KEYS)
+
+    totals = np.zeros((len(races), len(pairs), len(FIELDS) + len(positions)))
+    first = np.full((len(races), len(pairs)), np.nan)
+    if start:
+        fields = list(range(len(FIELDS))) + [
+            len(FIELDS) + positions.index(position) for position in old.positions
+        ]
+        kept = np.arange(len(old.pairs))
+        totals[:start, : len(kept)][:, :, fields] = old.totals[:start]
+        first[:start, : len(kept)] = old.first[:start]
+
+    added = np.zeros((len(races) - start, len(pairs), totals.shape[2]))
+    race = rows["Race"].to_numpy() - start
+    pair = rows["Pair"].to_numpy()
+    np.add.at(added, (race, pair, 0), rows["Points"].to_numpy(dtype=float))
+    np.add.at(added, (race, pair, 1), 1)
+    placed = rows["Position"].notna().to_numpy()
+    position = [len(FIELDS) + positions.index(int(p)) for p in rows["Position"][placed]]
+    np.add.at(added, (race[placed], pair[placed], position), 1)
+    totals[start:] = np.cumsum(added, axis=0) + (totals[start - 1] if start else 0)
+    lowest = rows.groupby(["Race", "Pair"])["First"].min()
+    first[lowest.index.get_level_values(0), lowest.index.get_level_values(1)] = (
+        lowest.to_numpy()
+    )
+
+    # pairs without any rows left, e.g. after a result was corrected
+    used = totals[-1, :, 1] > 0 if len(races) else np.zeros(len(pairs), dtype=bool)
+    return Standings(
+        races.reset_index(drop=True),
+        pairs[used].reset_index(drop=True),
+        positions,
+        totals[:, used],
+        first[:, used],
+    )
+
+
+def load(folder, since=None):
+    """standings of the season in folder, computed again from the first race
+    that changed (or the race at location since) and saved
+
+    FileNotFoundError if the season has no races table
+    """
+    begin = time.perf_counter()
+    season_store = store.get_store(folder)
+    races = _races(season_store)
+    old = _read(folder)
+    start = _first_change(old, races)
+    if since is not None and since in races["Country"].values:
+        start = min(start, races["Country"].tolist().index(since))
+    if old is not None and start == len(races) == len(old.races):
+        standings = old
+    else:
+        standings = _compute(old, races, season_store, start)
+        _write(folder, standings)
+    LOAD_TIMES[folder] = time.perf_counter() - begin
+    return standings
+
+
+def update(folder, location):
+    """standings after the result of the race at location was saved, only
+    that race and the ones after it are computed again"""
+    return load(folder, since=location)
@@ -0,0 +1,1236 @@
+"""storage backends for the data of a season
+
+a season folder is kept in one of three layouts:
+
+csv      races.csv, drivers.csv, teams.csv and races/race_<Country>.csv,
+         races/sprint_<Country>.csv per weekend (the original layout)
+parquet  a single typed season.parquet. all tables share one schema, a Table
+         column tells them apart and every table is its own row group, so
+         reading one table or a few countries only touches their row groups
+         and columns
+
+sqlite   all seasons of a data folder in one database <data folder>/df1sh.sqlite
+         (WAL mode), the tables have a season column and are indexed by
+         season and Country, DriverName or TeamName. good for queries over
+         many seasons and for concurrent saves
+
+get_store(folder) picks the backend from what is in the folder, empty
+folders get BACKEND. everything that reads or writes season data goes
+through the returned store. the layout of a season is converted with
+
+python -m utils.store migrate ./data [--to parquet|sqlite|csv] [--keep]
+python -m utils.store export ./data ./csv-copy
+
+(a data folder does all its seasons, a season folder just itself). export
+writes the csv layout somewhere else and leaves the seasons as they are
+
+writes never leave half a file for readers. every part of a season (a table
+name or "<session>_<location>" for a result) has a version. an editor takes
+the version(part) of the store before reading the part and saves with
+write_table / write_result(..., expected=version), which raise WriteConflict
+if somebody else saved the part in between:
+
+csv      the stat of the file (inode, mtime, size), a write goes to a new file
+         that replaces the old one
+parquet  a counter per part in the file metadata
+sqlite   a counter per part in the part_versions table, checked and counted
+         up in the transaction of the write
+
+every write also stamps the season in <data folder>/index.json, which lists
+the seasons without reading them (see current_index, and index for what
+else is kept there). processes share it through an flock on index.json.lock,
+writers of a parquet season file lock it the same way
+"""
+
+import argparse
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing, contextmanager
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # windows, the index is then only locked within the process
+    fcntl = None
+
+# backend of new seasons, see configure
+BACKEND = "csv"
+
+TABLES = ("races", "drivers", "teams")
+SESSIONS = ("race", "sprint")
+DATE_COLUMNS = {"races": ["StartDate", "EndDate"]}
+# types of the result columns when many results are read at once
+RESULT_DTYPES = {
+    "Position": "int64",
+    "DriverName": "str",
+    "TeamName": "str",
+    "Points": "float64",
+}
+# result files read in parallel by CsvStore.read_results
+READ_WORKERS = 8
+# seasons of a data folder and their last write, see list_seasons
+INDEX_FILE = "index.json"
+
+
+class WriteConflict(Exception):
+    """a part was saved by someone else since the version the writer read"""
+
+    def __init__(self, part, expected, found):
+        super().__init__(
+            f"{part} was saved by someone else in the meantime, "
+            "reload it and apply the changes again"
+        )
+        self.part = part
+        self.expected = expected
+        self.found = found
+
+
+# path -> lock, one writer at a time per file within the process
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _lock(path):
+    with _locks_lock:
+        return _locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+@contextmanager
+def _process_lock(path):
+    """_lock(path) that also holds off other processes, through an flock on
+    <path>.lock"""
+    with _lock(path):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _tmp_path(path):
+    """a file next to path only this writer uses"""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _check(part, expected, found):
+    if expected is not None and expected != found:
+        raise WriteConflict(part, expected, found)
+
+
+def _written(folder, dropped=False):
+    """stamp a write to the season in folder in the index of its data folder"""
+    data_folder, season = os.path.split(os.path.normpath(folder))
+    data_folder = data_folder or "."
+
+    def change(index):
+        # a migrated season is dropped from its old layout only
+        if dropped and not any(backend.holds(folder) for backend in BACKENDS.values()):
+            index.pop(season, None)
+        else:
+            index.setdefault(season, {})["updated"] = time.time()
+
+    update_index(data_folder, change)
+
+
+def configure(backend):
+    """backend ("csv" | "parquet" | "sqlite") for seasons that have no data yet"""
+    global BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown storage backend {backend!r}")
+    BACKEND = backend
+
+
+def get_store(folder):
+    """store of a season folder, in the layout found there"""
+    for backend in BACKENDS.values():
+        if backend.holds(folder):
+            return backend(folder)
+    return BACKENDS[BACKEND](folder)
+
+
+def _with_dates(name, df):
+    for column in DATE_COLUMNS.get(name, []):
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column])
+    return df
+
+
+class CsvStore:
+    name = "csv"
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    @staticmethod
+    def holds(folder):
+        return any(
+            os.path.exists(f"{folder}/{name}.csv") for name in TABLES
+        ) or os.path.isdir(f"{folder}/races")
+
+    def _result_path(self, location, session):
+        return f"{self.folder}/races/{session}_{location}.csv"
+
+    def _path(self, part):
+        if part in TABLES:
+            return f"{self.folder}/{part}.csv"
+        session, _, location = part.partition("_")
+        return self._result_path(location, session)
+
+    def version(self, part):
+        """version of a table or "<session>_<location>" result, 0 if there is none"""
+        try:
+            stat = os.stat(self._path(part))
+        except FileNotFoundError:
+            return 0
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _write(self, part, df, expected):
+        path = self._path(part)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = _tmp_path(path)
+        df.to_csv(tmp, index=False)
+        with _lock(path):
+            try:
+                _check(part, expected, self.version(part))
+            except WriteConflict:
+                os.remove(tmp)
+                raise
+            os.replace(tmp, path)
+            version = self.version(part)
+        _written(self.folder)
+        return version
+
+    def create(self):
+        os.makedirs(self.folder, exist_ok=True)
+        _written(self.folder)
+
+    def read_table(self, name, dtype=None):
+        """races, drivers or teams table, FileNotFoundError if it was never saved"""
+        return pd.read_csv(
+            f"{self.folder}/{name}.csv",
+            parse_dates=DATE_COLUMNS.get(name, False),
+            dtype=dtype,
+        )
+
+    def write_table(self, name, df, expected=None):
+        """save a table, returns its new version. with expected, WriteConflict
+        if the stored table is not at that version any more"""
+        return self._write(name, df, expected)
+
+    def read_result(self, location, session="race"):
+        """result table of a race or sprint, None if there is none"""
+        try:
+            return pd.read_csv(self._result_path(location, session))
+        except FileNotFoundError:
+            return None
+
+    def write_result(self, location, session, df, expected=None):
+        """save a result, returns its new version, expected as in write_table"""
+        return self._write(f"{session}_{location}", df, expected)
+
+    def write_results(self, results):
+        """save [(location, session, df)] results, returns their new versions"""
+        return [self.write_result(*result) for result in results]
+
+    def result_saved(self, location, session="race"):
+        """time the result was written, None if there is none"""
+        try:
+            return os.path.getmtime(self._result_path(location, session))
+        except FileNotFoundError:
+            return None
+
+    def list_results(self):
+        """(location, session) of all stored results"""
+        try:
+            files = sorted(os.listdir(self.folder + "/races"))
+        except FileNotFoundError:
+            return []
+        results = []
+        for file in files:
+            session, _, location = file.removesuffix(".csv").partition("_")
+            if file.endswith(".csv") and session in SESSIONS:
+                results.append((location, session))
+        return results
+
+    def saved_times(self):
+        """save times of all stored results, {"<session>_<location>": time}"""
+        return {
+            f"{session}_{location}": self.result_saved(location, session)
+            for location, session in self.list_results()
+        }
+
+    def set_saved(self, saved):
+        """overwrite the save times of results, {"<session>_<location>": time}"""
+        for part, saved_time in saved.items():
+            session, _, location = part.partition("_")
+            os.utime(self._result_path(location, session), (saved_time, saved_time))
+        _written(self.folder)
+
+    def fingerprint(self):
+        """changes whenever a file of the season is written or removed"""
+        paths = [f"{self.folder}/{name}.csv" for name in TABLES] + [
+            self._result_path(location, session)
+            for location, session in self.list_results()
+        ]
+        manifest = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            manifest.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(manifest)
+
+    def clear_results(self):
+        for location, session in self.list_results():
+            os.remove(self._result_path(location, session))
+        _written(self.folder)
+
+    def _read_text(self, result):
+        with open(self._result_path(*result), encoding="utf-8") as f:
+            return f.read()
+
+    def read_results(self, locations=None, columns=None):
+        """all results in one table with Country and Session columns
+
+        the files are read in parallel, files with the same header are parsed
+        together by a single read_csv, rows come grouped by header
+        """
+        results = [
+            (location, session)
+            for location, session in self.list_results()
+            if locations is None or location in locations
+        ]
+        if not results:
+            return pd.DataFrame(columns=(columns or []) + ["Country", "Session"])
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            texts = list(executor.map(self._read_text, results))
+        # header -> data lines prefixed with their Country and Session
+        batches = {}
+        for (location, session), text in zip(results, texts):
+            header, _, body = text.partition("\n")
+            prefix = '"{}",{},'.format(location.replace('"', '""'), session)
+            batches.setdefault(header.strip(), []).extend(
+                prefix + line for line in body.splitlines() if line
+            )
+        frames = [
+            pd.read_csv(
+                io.StringIO("Country,Session," + header + "\n" + "\n".join(lines)),
+                dtype=RESULT_DTYPES,
+            )
+            for header, lines in batches.items()
+        ]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        if columns is None:
+            columns = [
+                column for column in df.columns if column not in ("Country", "Session")
+            ]
+        return df.reindex(columns=columns + ["Country", "Session"])
+
+    def read_season(self):
+        """{"races", "drivers", "teams", "results"}, FileNotFoundError if a table is missing"""
+        season = {name: self.read_table(name) for name in TABLES}
+        season["results"] = self.read_results()
+        return season
+
+    def drop(self):
+        """remove the stored season data"""
+        self.clear_results()
+        for name in TABLES:
+            if os.path.exists(f"{self.folder}/{name}.csv"):
+                os.remove(f"{self.folder}/{name}.csv")
+        if os.path.isdir(self.folder + "/races") and not os.listdir(
+            self.folder + "/races"
+        ):
+            os.rmdir(self.folder + "/races")
+        _written(self.folder, dropped=True)
+
+
+class ParquetStore:
+    name = "parquet"
+    file_name = "season.parquet"
+
+    def __init__(self, folder):
+        if pa is None:
+            raise ImportError("the parquet storage backend needs pyarrow")
+        self.folder = folder
+        self.path = os.path.join(folder, self.file_name)
+
+    @classmethod
+    def holds(cls, folder):
+        return os.path.exists(os.path.join(folder, cls.file_name))
+
+    def create(self):
+        os.makedirs(self.folder, exist_ok=True)
+        _written(self.folder)
+
+    def _locked(self):
+        """lock of the season file, its lock file goes next to it"""
+        os.makedirs(self.folder, exist_ok=True)
+        return _process_lock(self.path)
+
+    def _meta(self):
+        """{"columns": {part: [...]}, "saved": {part: time}, "versions": {part: n}}
+        stored in the file"""
+        try:
+            metadata = pq.read_schema(self.path).metadata or {}
+        except FileNotFoundError:
+            metadata = {}
+        meta = json.loads(metadata.get(b"df1sh", b'{"columns": {}, "saved": {}}'))
+        # files written before parts had versions
+        meta.setdefault("versions", {})
+        return meta
+
+    @staticmethod
+    def _claim(meta, part, expected):
+        """count up the version of part in meta, WriteConflict if it is not expected"""
+        found = meta["versions"].get(part, 0)
+        _check(part, expected, found)
+        meta["versions"][part] = found + 1
+        return found + 1
+
+    def version(self, part):
+        """version of a table or "<session>_<location>" result, 0 if there is none"""
+        return self._meta()["versions"].get(part, 0)
+
+    def _read(self, filters, columns=None):
+        try:
+            return pq.read_table(self.path, filters=filters, columns=columns)
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _part(table, name, columns, session=None):
+        mask = pc.equal(table["Table"], name)
+        if session is not None:
+            mask = pc.and_(mask, pc.equal(table["Session"], session))
+        return table.filter(mask).select(columns).to_pandas()
+
+    @staticmethod
+    def _result_columns(meta):
+        """columns of race and sprint results together"""
+        columns = []
+        for session in SESSIONS:
+            for column in meta["columns"].get(f"results:{session}", []):
+                if column not in columns:
+                    columns.append(column)
+        return columns
+
+    def read_table(self, name, dtype=None):
+        """races, drivers or teams table, FileNotFoundError if it was never saved"""
+        columns = self._meta()["columns"].get(name)
+        if columns is None:
+            raise FileNotFoundError(f"{self.path}: no {name} table")
+        table = self._read([("Table", "=", name)], columns + ["Table"])
+        df = self._part(table, name, columns)
+        if dtype is not None:
+            df = df.astype({key: value for key, value in dtype.items() if key in df})
+        return df
+
+    def read_result(self, location, session="race"):
+        """result table of a race or sprint, None if there is none"""
+        meta = self._meta()
+        if f"{session}_{location}" not in meta["saved"]:
+            return None
+        columns = meta["columns"][f"results:{session}"]
+        table = self._read(
+            [("Table", "=", "results"), ("Country", "=", location)],
+            columns + ["Table", "Session"],
+        )
+        return self._part(table, "results", columns, session)
+
+    def result_saved(self, location, session="race"):
+        """time the result was written, None if there is none"""
+        return self._meta()["saved"].get(f"{session}_{location}")
+
+    def list_results(self):
+        """(location, session) of all stored results"""
+        return [tuple(reversed(part.split("_", 1))) for part in self._meta()["saved"]]
+
+    def read_results(self, locations=None, columns=None):
+        """all results in one table with Country and Session columns"""
+        meta = self._meta()
+        if columns is None:
+            columns = self._result_columns(meta)
+        filters = [("Table", "=", "results")]
+        if locations is not None:
+            filters.append(("Country", "in", list(locations)))
+        table = self._read(filters, columns + ["Country", "Session", "Table"])
+        if table is None or not meta["saved"]:
+            return pd.DataFrame(columns=columns + ["Country", "Session"])
+        return self._part(table, "results", columns + ["Country", "Session"])
+
+    def read_season(self):
+        """{"races", "drivers", "teams", "results"}, FileNotFoundError if a table is missing"""
+        meta = self._meta()
+        table = self._read(None)
+        missing = [name for name in TABLES if name not in meta["columns"]]
+        if table is None or missing:
+            raise FileNotFoundError(f"{self.path}: no {', '.join(missing)} table")
+        season = {
+            name: self._part(table, name, meta["columns"][name]) for name in TABLES
+        }
+        columns = self._result_columns(meta)
+        season["results"] = self._part(
+            table, "results", columns + ["Country", "Session"]
+        )
+        return season
+
+    def _load(self):
+        """all parts of the file as {part: df}, parts are table names or (location, session)"""
+        meta = self._meta()
+        table = self._read(None)
+        parts = {}
+        if table is None:
+            return parts, meta
+        for name in TABLES:
+            if name in meta["columns"]:
+                parts[name] = self._part(table, name, meta["columns"][name])
+        for location, session in self.list_results():
+            mask = pc.and_(
+                pc.equal(table["Table"], "results"),
+                pc.and_(
+                    pc.equal(table["Session"], session),
+                    pc.equal(table["Country"], location),
+                ),
+            )
+            parts[(location, session)] = (
+                table.filter(mask)
+                .select(meta["columns"][f"results:{session}"])
+                .to_pandas()
+            )
+        return parts, meta
+
+    def _write(self, tables, schema, meta):
+        """write arrow tables as the row groups of a new file and swap it in,
+        readers never see half a file"""
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = _tmp_path(self.path)
+        with pq.ParquetWriter(
+            tmp, schema.with_metadata({"df1sh": json.dumps(meta)})
+        ) as writer:
+            for table in tables:
+                writer.write_table(table)
+        os.replace(tmp, self.path)
+        _written(self.folder)
+
+    def _save(self, parts, meta):
+        tables = [pa.table({"Table": pa.array([], pa.string())})]
+        for part, df in parts.items():
+            if isinstance(part, tuple):
+                location, session = part
+                df = df.assign(Table="results", Country=location, Session=session)
+            else:
+                df = _with_dates(part, df.copy()).assign(Table=part)
+            tables.append(pa.Table.from_pandas(df, preserve_index=False))
+        schema = pa.unify_schemas(
+            [table.schema.remove_metadata() for table in tables],
+            promote_options="permissive",
+        )
+        # one row group per table or result
+        self._write(
+            [
+                pa.Table.from_arrays(
+                    [
+                        (
+                            table[field.name].cast(field.type)
+                            if field.name in table.column_names
+                            else pa.nulls(len(table), field.type)
+                        )
+                        for field in schema
+                    ],
+                    schema=schema,
+                )
+                for table in tables[1:]
+            ],
+            schema,
+            meta,
+        )
+
+    def _rewrite(self, meta, keep=None):
+        """write the file again with new meta, without the row groups of the
+        parts keep(part) is False for. the row groups are copied as they are"""
+        try:
+            file = pq.ParquetFile(self.path)
+        except FileNotFoundError:
+            self._save({}, meta)
+            return
+        with file:
+            schema = file.schema_arrow.remove_metadata()
+            groups = [file.read_row_group(i) for i in range(file.num_row_groups)]
+        if keep is not None:
+            groups = [
+                group
+                for group in groups
+                if len(group) and keep(group["Table"][0].as_py())
+            ]
+        self._write(groups, schema, meta)
+
+    def write_table(self, name, df, expected=None):
+        """save a table, returns its new version. with expected, WriteConflict
+        if the stored table is not at that version any more"""
+        # one writer at a time, other processes too. a write rewrites the
+        # whole file, see write_results to save many results
+        with self._locked():
+            parts, meta = self._load()
+            version = self._claim(meta, name, expected)
+            parts[name] = df
+            meta["columns"][name] = list(df.columns)
+            self._save(parts, meta)
+        return version
+
+    def _add_result(self, parts, meta, location, session, df, expected=None):
+        version = self._claim(meta, f"{session}_{location}", expected)
+        parts[(location, session)] = df
+        columns = meta["columns"].setdefault(f"results:{session}", [])
+        columns.extend(column for column in df.columns if column not in columns)
+        meta["saved"][f"{session}_{location}"] = time.time()
+        return version
+
+    def write_result(self, location, session, df, expected=None):
+        """save a result, returns its new version, expected as in write_table"""
+        with self._locked():
+            parts, meta = self._load()
+            version = self._add_result(parts, meta, location, session, df, expected)
+            self._save(parts, meta)
+        return version
+
+    def write_results(self, results):
+        """save [(location, session, df)] results with a single rewrite of the
+        file, returns their new versions"""
+        with self._locked():
+            parts, meta = self._load()
+            versions = [self._add_result(parts, meta, *result) for result in results]
+            self._save(parts, meta)
+        return versions
+
+    def fingerprint(self):
+        """changes whenever the season file is written or removed"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def saved_times(self):
+        """save times of all stored results, {"<session>_<location>": time}"""
+        return self._meta()["saved"]
+
+    def set_saved(self, saved):
+        """overwrite the save times of results, {"<session>_<location>": time}"""
+        with self._locked():
+            meta = self._meta()
+            meta["saved"].update(saved)
+            self._rewrite(meta)
+
+    def clear_results(self):
+        with self._locked():
+            meta = self._meta()
+            for part in meta["saved"]:
+                self._claim(meta, part, None)
+            meta["saved"] = {}
+            self._rewrite(meta, keep=lambda part: part != "results")
+
+    def drop(self):
+        """remove the stored season data"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        _written(self.folder, dropped=True)
+
+
+class SqliteStore:
+    """a season in the sqlite database shared by all seasons of a data folder"""
+
+    name = "sqlite"
+    file_name = "df1sh.sqlite"
+    columns = {
+        "races": ["StartDate", "EndDate", "Country", "City", "Circuit", "HasSprint"],
+        "drivers": ["DriverName", "TeamName"],
+        "teams": ["TeamName", "Color"],
+        "race": ["Position", "DriverName", "TeamName", "Points", "FastestLap"],
+        "sprint": ["Position", "DriverName", "TeamName", "Points"],
+    }
+    schema = """
+    CREATE TABLE IF NOT EXISTS seasons (season TEXT PRIMARY KEY);
+    CREATE TABLE IF NOT EXISTS races (
+        season TEXT NOT NULL, StartDate TEXT, EndDate TEXT, Country TEXT,
+        City TEXT, Circuit TEXT, HasSprint INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS drivers (
+        season TEXT NOT NULL, DriverName TEXT, TeamName TEXT
+    );
+    CREATE TABLE IF NOT EXISTS teams (season TEXT NOT NULL, TeamName TEXT, Color TEXT);
+    CREATE TABLE IF NOT EXISTS results (
+        season TEXT NOT NULL, Country TEXT NOT NULL, Session TEXT NOT NULL,
+        Position INTEGER, DriverName TEXT, TeamName TEXT, Points NUMERIC,
+        FastestLap INTEGER
+    );
+    CREATE TABLE IF NOT EXISTS saved (
+        season TEXT NOT NULL, Country TEXT NOT NULL, Session TEXT NOT NULL,
+        saved REAL, PRIMARY KEY (season, Country, Session)
+    );
+    CREATE TABLE IF NOT EXISTS part_versions (
+        season TEXT NOT NULL, part TEXT NOT NULL, version INTEGER NOT NULL,
+        PRIMARY KEY (season, part)
+    );
+    CREATE TABLE IF NOT EXISTS versions (season TEXT PRIMARY KEY, version INTEGER);
+    CREATE INDEX IF NOT EXISTS races_country ON races (season, Country);
+    CREATE INDEX IF NOT EXISTS drivers_driver ON drivers (season, DriverName);
+    CREATE INDEX IF NOT EXISTS teams_team ON teams (season, TeamName);
+    CREATE INDEX IF NOT EXISTS results_country ON results (season, Country);
+    CREATE INDEX IF NOT EXISTS results_driver ON results (season, DriverName);
+    CREATE INDEX IF NOT EXISTS results_team ON results (season, TeamName);
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.season = os.path.basename(os.path.normpath(folder))
+        self.path = self.db_path(os.path.dirname(os.path.normpath(folder)))
+
+    @classmethod
+    def db_path(cls, data_folder):
+        return os.path.join(data_folder or ".", cls.file_name)
+
+    @staticmethod
+    def holds(folder):
+        # the seasons of the database are only queried again once it changed
+        data_folder, season = os.path.split(os.path.normpath(folder))
+        return season in _db_seasons(data_folder)
+
+    def _connect(self):
+        return closing(connect(self.path))
+
+    def _select(self, connection, table, columns, where="", params=()):
+        select = ", ".join(f'"{column}"' for column in columns)
+        return pd.read_sql_query(
+            f"SELECT {select} FROM {table} WHERE season = ? {where} ORDER BY rowid",
+            connection,
+            params=(self.season, *params),
+        )
+
+    @staticmethod
+    def _rows(df, columns):
+        df = df.reindex(columns=columns)
+        for column in ("StartDate", "EndDate"):
+            if column in df:
+                df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d")
+        # numpy scalars and NaN to plain python values sqlite understands
+        df = df.astype(object).where(df.notna(), None)
+        return list(df.itertuples(index=False, name=None))
+
+    def _fix_types(self, name, df):
+        if name == "races":
+            df = _with_dates(name, df)
+            df["HasSprint"] = df["HasSprint"].astype(bool)
+        if name in ("race", "results") and "FastestLap" in df:
+            # sqlite has no booleans, results of sprints have no FastestLap
+            df["FastestLap"] = df["FastestLap"].map({0: False, 1: True})
+            if df["FastestLap"].notna().all():
+                df["FastestLap"] = df["FastestLap"].astype(bool)
+        return df
+
+    def _bump(self, connection):
+        """count a write to the season, see fingerprint"""
+        connection.execute(
+            "INSERT INTO versions VALUES (?, 1) "
+            "ON CONFLICT (season) DO UPDATE SET version = version + 1",
+            (self.season,),
+        )
+
+    def _claim(self, connection, part, expected):
+        """count up the version of part, WriteConflict if it was not expected
+
+        the first write of a transaction, it holds the write lock of the
+        database from here on, so nobody can save the part in between
+        """
+        connection.execute(
+            "INSERT INTO part_versions VALUES (?, ?, 1) "
+            "ON CONFLICT (season, part) DO UPDATE SET version = version + 1",
+            (self.season, part),
+        )
+        (version,) = connection.execute(
+            "SELECT version FROM part_versions WHERE season = ? AND part = ?",
+            (self.season, part),
+        ).fetchone()
+        _check(part, expected, version - 1)
+        return version
+
+    def version(self, part):
+        """version of a table or "<session>_<location>" result, 0 if there is none"""
+        if not os.path.exists(self.path):
+            return 0
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT version FROM part_versions WHERE season = ? AND part = ?",
+                (self.season, part),
+            ).fetchone()
+        return 0 if row is None else row[0]
+
+    def create(self):
+        os.makedirs(self.folder, exist_ok=True)
+        with self._connect() as connection, connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO seasons VALUES (?)", (self.season,)
+            )
+        _written(self.folder)
+
+    def read_table(self, name, dtype=None):
+        """races, drivers or teams table, FileNotFoundError if it was never saved"""
+        if not self.holds(self.folder):
+            raise FileNotFoundError(f"{self.path}: no season {self.season}")
+        with self._connect() as connection:
+            df = self._select(connection, name, self.columns[name])
+        df = self._fix_types(name, df)
+        if dtype is not None:
+            df = df.astype({key: value for key, value in dtype.items() if key in df})
+        return df
+
+    def write_table(self, name, df, expected=None):
+        """save a table, returns its new version. with expected, WriteConflict
+        if the stored table is not at that version any more"""
+        self.create()
+        columns = self.columns[name]
+        with self._connect() as connection, connection:
+            version = self._claim(connection, name, expected)
+            connection.execute(f"DELETE FROM {name} WHERE season = ?", (self.season,))
+            connection.executemany(
+                f"INSERT INTO {name} (season, {', '.join(columns)}) "
+                f"VALUES (?{', ?' * len(columns)})",
+                [(self.season, *row) for row in self._rows(df, columns)],
+            )
+            self._bump(connection)
+        _written(self.folder)
+        return version
+
+    def read_result(self, location, session="race"):
+        """result table of a race or sprint, None if there is none"""
+        if self.result_saved(location, session) is None:
+            return None
+        with self._connect() as connection:
+            df = self._select(
+                connection,
+                "results",
+                self.columns[session],
+                "AND Country = ? AND Session = ?",
+                (location, session),
+            )
+        return self._fix_types(session, df)
+
+    def write_result(self, location, session, df, expected=None):
+        """save a result, returns its new version, expected as in write_table"""
+        self.create()
+        columns = self.columns[session]
+        with self._connect() as connection, connection:
+            version = self._claim(connection, f"{session}_{location}", expected)
+            connection.execute(
+                "DELETE FROM results WHERE season = ? AND Country = ? AND Session = ?",
+                (self.season, location, session),
+            )
+            connection.executemany(
+                f"INSERT INTO results (season, Country, Session, {', '.join(columns)}) "
+                f"VALUES (?, ?, ?{', ?' * len(columns)})",
+                [
+                    (self.season, location, session, *row)
+                    for row in self._rows(df, columns)
+                ],
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO saved VALUES (?, ?, ?, ?)",
+                (self.season, location, session, time.time()),
+            )
+            self._bump(connection)
+        _written(self.folder)
+        return version
+
+    def write_results(self, results):
+        """save [(location, session, df)] results, returns their new versions"""
+        return [self.write_result(*result) for result in results]
+
+    def result_saved(self, location, session="race"):
+        """time the result was written, None if there is none"""
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT saved FROM saved WHERE season = ? AND Country = ? "
+                "AND Session = ?",
+                (self.season, location, session),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def list_results(self):
+        """(location, session) of all stored results"""
+        if not os.path.exists(self.path):
+            return []
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT Country, Session FROM saved WHERE season = ? ORDER BY rowid",
+                (self.season,),
+            ).fetchall()
+
+    def saved_times(self):
+        """save times of all stored results, {"<session>_<location>": time}"""
+        if not os.path.exists(self.path):
+            return {}
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT Country, Session, saved FROM saved WHERE season = ?",
+                (self.season,),
+            ).fetchall()
+        return {f"{session}_{location}": saved for location, session, saved in rows}
+
+    def set_saved(self, saved):
+        """overwrite the save times of results, {"<session>_<location>": time}"""
+        with self._connect() as connection, connection:
+            connection.executemany(
+                "UPDATE saved SET saved = ? WHERE season = ? AND Country = ? "
+                "AND Session = ?",
+                [
+                    (saved_time, self.season, *reversed(part.split("_", 1)))
+                    for part, saved_time in saved.items()
+                ],
+            )
+            self._bump(connection)
+        _written(self.folder)
+
+    def fingerprint(self):
+        """changes whenever the season is written, the other seasons do not count"""
+        if not os.path.exists(self.path):
+            return None
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT version FROM versions WHERE season = ?", (self.season,)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def clear_results(self):
+        if not os.path.exists(self.path):
+            return
+        with self._connect() as connection, connection:
+            # editors of the cleared results have to reload them
+            connection.execute(
+                "UPDATE part_versions SET version = version + 1 WHERE season = ? "
+                f"AND part NOT IN ({', '.join('?' * len(TABLES))})",
+                (self.season, *TABLES),
+            )
+            for table in ("results", "saved"):
+                connection.execute(
+                    f"DELETE FROM {table} WHERE season = ?", (self.season,)
+                )
+            self._bump(connection)
+        _written(self.folder)
+
+    def read_results(self, locations=None, columns=None):
+        """all results in one table with Country and Session columns"""
+        columns = columns or self.columns["race"]
+        where, params = "", ()
+        if locations is not None:
+            locations = list(locations)
+            where = f"AND Country IN ({', '.join('?' * len(locations))})"
+            params = tuple(locations)
+        with self._connect() as connection:
+            df = self._select(
+                connection, "results", columns + ["Country", "Session"], where, params
+            )
+        return self._fix_types("results", df)
+
+    def read_season(self):
+        """{"races", "drivers", "teams", "results"}, FileNotFoundError if a table is missing"""
+        if not self.holds(self.folder):
+            raise FileNotFoundError(f"{self.path}: no season {self.season}")
+        with self._connect() as connection:
+            season = {
+                name: self._fix_types(
+                    name, self._select(connection, name, self.columns[name])
+                )
+                for name in TABLES
+            }
+            results = self._select(
+                connection, "results", self.columns["race"] + ["Country", "Session"]
+            )
+        season["results"] = self._fix_types("results", results)
+        return season
+
+    def drop(self):
+        """remove the stored season data"""
+        if not os.path.exists(self.path):
+            return
+        with self._connect() as connection, connection:
+            for table in ("seasons", *TABLES, "results", "saved"):
+                connection.execute(
+                    f"DELETE FROM {table} WHERE season = ?", (self.season,)
+                )
+            # the versions are kept, a new season of that name counts on
+            connection.execute(
+                "UPDATE part_versions SET version = version + 1 WHERE season = ?",
+                (self.season,),
+            )
+            self._bump(connection)
+        _written(self.folder, dropped=True)
+
+
+BACKENDS = {"sqlite": SqliteStore, "parquet": ParquetStore, "csv": CsvStore}
+
+# databases whose tables were set up by this process
+_created = set()
+_created_lock = threading.Lock()
+
+
+def connect(path):
+    """connection to a sqlite store (see SqliteStore), creates the tables
+
+    all seasons of a data folder are in one database, which makes it easy to
+    query across seasons, e.g.
+    pd.read_sql_query("SELECT * FROM results", connect("./data/df1sh.sqlite"))
+    """
+    new = not os.path.exists(path)
+    connection = sqlite3.connect(path, timeout=30)
+    with _created_lock:
+        if new or path not in _created:
+            # readers do not block the writer and the other way round
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.executescript(SqliteStore.schema)
+            _created.add(path)
+    return connection
+
+
+def fingerprint(folder):
+    """a value that changes whenever the data of the season in folder changes
+
+    csv and parquet seasons use the modification times and sizes of their
+    files, sqlite seasons a version counted up on every write. meant as a
+    cache key next to the folder
+    """
+    store = get_store(folder)
+    return store.name, store.fingerprint()
+
+
+# database path -> (stat of its files, seasons in it), see _db_seasons
+_db_seasons_cache = {}
+# data folder -> its mtime when all its season folders were in the index
+_folders_checked = {}
+
+
+def _db_stamp(path):
+    """mtime and size of a database and of its write-ahead log, which takes
+    the writes until a checkpoint. None for a file that does not exist"""
+    stamp = []
+    for file in (path, path + "-wal"):
+        try:
+            stat = os.stat(file)
+        except FileNotFoundError:
+            stamp.append(None)
+        else:
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(stamp)
+
+
+def _db_seasons(data_folder):
+    """seasons in the database of a data folder, only queried again once the
+    database changed"""
+    path = SqliteStore.db_path(data_folder)
+    stamp = _db_stamp(path)
+    if stamp[0] is None:
+        return frozenset()
+    cached = _db_seasons_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with closing(connect(path)) as connection:
+        seasons = frozenset(
+            season for (season,) in connection.execute("SELECT season FROM seasons")
+        )
+    _db_seasons_cache[path] = (stamp, seasons)
+    return seasons
+
+
+def _scan(data_folder):
+    """names of the seasons in a data folder, folders and seasons in the database"""
+    seasons = {
+        name
+        for name in os.listdir(data_folder)
+        if os.path.isdir(os.path.join(data_folder, name))
+    }
+    return seasons | _db_seasons(data_folder)
+
+
+def _new_folders(data_folder, index):
+    """season folders missing from index. the data folder is only listed
+    again once its mtime moved (a folder was added or removed)"""
+    mtime = os.stat(data_folder).st_mtime_ns
+    if _folders_checked.get(data_folder) == mtime:
+        return set()
+    folders = {
+        name
+        for name in os.listdir(data_folder)
+        if name not in index and os.path.isdir(os.path.join(data_folder, name))
+    }
+    _folders_checked[data_folder] = mtime
+    return folders
+
+
+def _index_path(data_folder):
+    return os.path.join(data_folder, INDEX_FILE)
+
+
+def _first_seen(data_folder, season):
+    """index entry of a season found in the data folder, the folder time as
+    its last write"""
+    folder = os.path.join(data_folder, season)
+    return {"updated": os.path.getmtime(folder) if os.path.isdir(folder) else 0.0}
+
+
+def read_index(data_folder):
+    """{season: {"updated": time, ...}} of the data folder, None if it has no index"""
+    try:
+        with open(_index_path(data_folder), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def update_index(data_folder, change, scan=False):
+    """call change(index) on the index of the data folder and save it
+
+    the index is made from the folders (see _scan) if there is none yet or
+    with scan, keeping what it knew about the seasons found. processes and
+    threads update it one at a time (see _process_lock). returns the index
+    """
+    path = _index_path(data_folder)
+    with _process_lock(path):
+        index = None if scan else read_index(data_folder)
+        if index is None:
+            known = read_index(data_folder) or {}
+            index = {
+                season: known.get(season) or _first_seen(data_folder, season)
+                for season in _scan(data_folder)
+            }
+        change(index)
+        tmp = _tmp_path(path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+    return index
+
+
+def current_index(data_folder, scan=False):
+    """the index of a data folder with every season in it. seasons found in
+    the folders or the database but missing from the index are added, scan
+    (or a missing index) also drops those that are gone (see _scan). the
+    folders are only listed and the database only queried once they changed,
+    otherwise the index is taken as it is.
+    FileNotFoundError if the data folder does not exist"""
+    index = None if scan else read_index(data_folder)
+    if index is None:
+        return update_index(data_folder, lambda index: None, scan=True)
+    missing = _new_folders(data_folder, index) | (
+        _db_seasons(data_folder) - index.keys()
+    )
+    if missing:
+
+        def change(index):
+            for season in missing:
+                index.setdefault(season, _first_seen(data_folder, season))
+
+        index = update_index(data_folder, change)
+    return index
+
+
+def list_seasons(data_folder, scan=False):
+    """names of all seasons in a data folder, see current_index"""
+    return sorted(current_index(data_folder, scan))
+
+
+def copy(source, target):
+    """write all data of the store `source` to the store `target`"""
+    for name in TABLES:
+        try:
+            target.write_table(name, source.read_table(name))
+        except FileNotFoundError:
+            continue
+    saved = {}
+    results = []
+    for location, session in source.list_results():
+        results.append((location, session, source.read_result(location, session)))
+        saved[f"{session}_{location}"] = source.result_saved(location, session)
+    if results:
+        target.write_results(results)
+    if saved:
+        target.set_saved(saved)
+    return target
+
+
+def migrate(folder, backend="parquet", keep=False):
+    """move a season folder to another layout, returns the new store
+
+    the old data is removed afterwards unless `keep`
+    """
+    source = get_store(folder)
+    target = BACKENDS[backend](folder)
+    if source.name == backend or not source.holds(folder):
+        return target
+    copy(source, target)
+    if not keep:
+        source.drop()
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the storage of seasons.")
+    parser.add_argument(
+        "command",
+        choices=["migrate", "export"],
+        help="migrate: convert the seasons in place, "
+        "export: write a csv copy of the seasons to DEST",
+    )
+    parser.add_argument("folder", help="data folder or a single season folder")
+    parser.add_argument("dest", nargs="?", help="data folder to export to")
+    parser.add_argument("--to", default="parquet", choices=list(BACKENDS))
+    parser.add_argument(
+        "--keep", action="store_true", help="keep the data of the old layout"
+    )
+    args = parser.parse_args()
+    if args.command == "export" and args.dest is None:
+        parser.error("export needs DEST")
+
+    if any(backend.holds(args.folder) for backend in BACKENDS.values()):
+        folders = [args.folder]
+    else:
+        folders = [
+            os.path.join(args.folder, season)
+            for season in list_seasons(args.folder, scan=True)
+        ]
+    for folder in folders:
+        start = time.perf_counter()
+        before = get_store(folder).name
+        if args.command == "export":
+            target = os.path.join(args.dest, os.path.basename(os.path.normpath(folder)))
+            copy(get_store(folder), CsvStore(target))
+        else:
+            target = folder
+            migrate(folder, args.to, args.keep)
+        after = "csv" if args.command == "export" else args.to
+        print(
+            f"{folder}: {before} -> {after} {target} "
+            f"({time.perf_counter() - start:.2f} s)"
+        )
+
+
+if __name__ == "__main__":
+    main()